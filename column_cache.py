@@ -0,0 +1,115 @@
+"""
+Transportation Analytics System
+Column cache: memory-mapped, fixed-width copy of the master table
+
+Layout (data/master_cache/):
+    meta.json              rows, data version, per-column kind
+    <col>.npy              numeric columns as-is, datetimes as int64 ns
+    <col>.codes.npy        string columns: int32 dictionary codes (-1 = missing)
+    <col>.dict.json        string columns: the dictionary
+
+open_cache() maps only the requested columns, so start-up cost does not grow
+with the number of trips the way CSV parsing does.
+"""
+import hashlib
+import json
+import os
+import shutil
+import numpy as np
+import pandas as pd
+
+CACHE_DIR  = "data/master_cache"
+MASTER_CSV = "data/master_analytics_table.csv"
+
+def data_version(master):
+    """Content hash of the master table (stable across identical rebuilds)."""
+    h = hashlib.sha1(pd.util.hash_pandas_object(master, index=False).to_numpy().tobytes())
+    return f"{len(master)}-{h.hexdigest()[:16]}"
+
+# ── Write ─────────────────────────────────────────────────────────────────────
+def write_cache(master, root=CACHE_DIR):
+    """Write every column of `master`; the new cache replaces the old one atomically."""
+    tmp = root + ".tmp"
+    shutil.rmtree(tmp, ignore_errors=True)
+    os.makedirs(tmp)
+    cols = []
+    for col in master.columns:
+        s = master[col]
+        if pd.api.types.is_datetime64_any_dtype(s):
+            np.save(os.path.join(tmp, f"{col}.npy"), s.to_numpy("datetime64[ns]").view(np.int64))
+            kind = "datetime"
+        elif pd.api.types.is_numeric_dtype(s) and not pd.api.types.is_bool_dtype(s):
+            np.save(os.path.join(tmp, f"{col}.npy"), s.to_numpy())
+            kind = "numeric"
+        else:
+            codes, uniques = pd.factorize(s.astype(object), sort=True)
+            np.save(os.path.join(tmp, f"{col}.codes.npy"), codes.astype(np.int32))
+            with open(os.path.join(tmp, f"{col}.dict.json"), "w") as f:
+                json.dump([str(u) for u in uniques], f)
+            kind = "string"
+        cols.append({"name": col, "kind": kind})
+    with open(os.path.join(tmp, "meta.json"), "w") as f:
+        json.dump({"rows": len(master), "version": data_version(master), "columns": cols}, f, indent=1)
+    old = root + ".old"
+    shutil.rmtree(old, ignore_errors=True)
+    if os.path.exists(root):
+        os.rename(root, old)
+    os.rename(tmp, root)
+    shutil.rmtree(old, ignore_errors=True)
+    return root
+
+# ── Read ──────────────────────────────────────────────────────────────────────
+def read_meta(root=CACHE_DIR):
+    with open(os.path.join(root, "meta.json")) as f:
+        return json.load(f)
+
+def open_cache(columns=None, root=CACHE_DIR, decode=True):
+    """Master table from the cache, mapping only `columns` (default: all).
+
+    Numeric and datetime columns are zero-copy views of the mapped files.
+    String columns are decoded to object arrays (decode=True, matching the
+    CSV loader) or returned as pandas Categoricals over the mapped codes.
+    """
+    meta  = read_meta(root)
+    kinds = {c["name"]: c["kind"] for c in meta["columns"]}
+    names = list(kinds) if columns is None else list(columns)
+    data  = {}
+    for col in names:
+        kind = kinds[col]
+        if kind == "numeric":
+            data[col] = np.load(os.path.join(root, f"{col}.npy"), mmap_mode="r")
+        elif kind == "datetime":
+            data[col] = np.load(os.path.join(root, f"{col}.npy"), mmap_mode="r").view("datetime64[ns]")
+        else:
+            codes = np.load(os.path.join(root, f"{col}.codes.npy"), mmap_mode="r")
+            with open(os.path.join(root, f"{col}.dict.json")) as f:
+                vocab = json.load(f)
+            if decode:
+                lookup = np.array(vocab + [np.nan], dtype=object)  # code -1 -> NaN
+                data[col] = lookup[codes]
+            else:
+                data[col] = pd.Categorical.from_codes(codes, categories=vocab)
+    return pd.DataFrame(data, copy=False)
+
+def cache_is_fresh(root=CACHE_DIR, csv_path=MASTER_CSV):
+    meta = os.path.join(root, "meta.json")
+    if not os.path.exists(meta):
+        return False
+    return not os.path.exists(csv_path) or os.path.getmtime(meta) >= os.path.getmtime(csv_path)
+
+def current_version(root=CACHE_DIR, csv_path=MASTER_CSV):
+    """Data version of what load_master() returns: the cache's content hash when
+    the cache is current, else the CSV's mtime and size."""
+    if cache_is_fresh(root, csv_path):
+        return read_meta(root)["version"]
+    st = os.stat(csv_path)
+    return f"csv-{st.st_mtime_ns}-{st.st_size}"
+
+def load_master(columns=None, root=CACHE_DIR, csv_path=MASTER_CSV, decode=True):
+    """Report entry point: the column cache when it is current, else the CSV.
+    decode=False keeps cached string columns as Categoricals over the mapped codes
+    (the CSV fallback always yields plain strings)."""
+    if cache_is_fresh(root, csv_path):
+        return open_cache(columns, root, decode)
+    dates = ["trip_date"] if columns is None or "trip_date" in columns else None
+    return pd.read_csv(csv_path, usecols=columns, parse_dates=dates)
@@ -0,0 +1,208 @@
+"""
+Transportation Analytics System
+What-if cost simulator and vehicle-type assignment per route category
+
+Usage:
+    python cost_simulator.py [--scenarios 5000] [--spread 0.25] [--workers 4]
+
+The ETL cost model is linear in its rates:
+    total_trip_cost = fuel_cost + toll_cost + labour_cost + maintenance
+so a scenario is a vector of multipliers on those components (fuel price per
+fuel type, toll, labour, maintenance). The trips are reduced once to
+per-km component costs for every (vehicle_type, route_category) cell; each
+batch of scenarios is then a single einsum over that tensor, which is exact
+and independent of the number of trips.
+
+Reassignment assumes a vehicle type costs the same per km on a category as
+it does today on that category (cells with fewer than MIN_CELL_TRIPS trips
+are not eligible).
+"""
+import argparse
+import os
+import numpy as np
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+
+from column_cache import load_master
+from schemas import FUEL_TYPES
+
+PARAMS         = [f"fuel_{f.lower()}" for f in FUEL_TYPES] + ["toll", "labour", "maint"]
+MIN_CELL_TRIPS = 5
+BATCH          = 4096     # scenarios per einsum batch
+OUT_PATH       = "outputs/cost_scenarios.csv"
+
+BASE_COLS = ["vehicle_type", "route_category", "fuel_type", "distance_km", "fuel_cost_inr",
+             "toll_cost_inr", "labour_cost_inr", "total_trip_cost_inr"]
+
+# ── Trip components ───────────────────────────────────────────────────────────
+def cost_components(master):
+    """Per-trip cost matrix (n_trips x len(PARAMS)); fuel cost sits in its fuel type's column."""
+    n    = len(master)
+    comp = np.zeros((n, len(PARAMS)))
+    ft   = pd.Index(FUEL_TYPES).get_indexer(master["fuel_type"])
+    fuel = master["fuel_cost_inr"].to_numpy(float)
+    ok   = ft >= 0
+    comp[np.flatnonzero(ok), ft[ok]] = fuel[ok]
+    comp[:, -3] = master["toll_cost_inr"].to_numpy(float)
+    comp[:, -2] = master["labour_cost_inr"].to_numpy(float)
+    # Maintenance is whatever the ETL allocated on top of the three direct costs
+    comp[:, -1] = master["total_trip_cost_inr"].to_numpy(float) - fuel - comp[:, -3] - comp[:, -2]
+    return np.nan_to_num(comp)
+
+def trip_costs(master, scenario):
+    """Per-trip total cost and cost/km under one scenario (dict or vector of multipliers)."""
+    s    = scenario_vector(scenario)
+    cost = cost_components(master) @ s
+    return pd.DataFrame({"trip_id": master["trip_id"].to_numpy(), "total_trip_cost_inr": cost,
+                         "cost_per_km": cost / master["distance_km"].to_numpy(float)})
+
+def reduce_cells(master, min_trips=MIN_CELL_TRIPS):
+    """Collapse trips to (vehicle_type, route_category) cells.
+
+    Returns {"vehicle_types", "categories", "km" (V,C), "trips" (V,C),
+             "per_km" (V,C,P) component cost per km, "eligible" (V,C)}.
+    """
+    vt, vtypes = pd.factorize(master["vehicle_type"], sort=True)
+    rc, cats   = pd.factorize(master["route_category"], sort=True)
+    V, C       = len(vtypes), len(cats)
+    cell       = vt * C + rc
+    comp       = cost_components(master)
+    km    = np.bincount(cell, weights=master["distance_km"].to_numpy(float), minlength=V * C)
+    trips = np.bincount(cell, minlength=V * C)
+    sums  = np.stack([np.bincount(cell, weights=comp[:, p], minlength=V * C)
+                      for p in range(len(PARAMS))], axis=-1)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        per_km = np.where(km[:, None] > 0, sums / km[:, None], 0.0)
+    return {"vehicle_types": list(vtypes), "categories": list(cats),
+            "km": km.reshape(V, C), "trips": trips.reshape(V, C),
+            "per_km": per_km.reshape(V, C, len(PARAMS)),
+            "eligible": trips.reshape(V, C) >= min_trips}
+
+# ── Scenarios ─────────────────────────────────────────────────────────────────
+def scenario_vector(scenario):
+    if isinstance(scenario, dict):
+        unknown = set(scenario) - set(PARAMS)
+        if unknown:
+            raise ValueError(f"unknown scenario parameters: {sorted(unknown)}")
+        return np.array([float(scenario.get(p, 1.0)) for p in PARAMS])
+    return np.asarray(scenario, dtype=float)
+
+def scenario_grid(**axes):
+    """Cartesian product of multiplier values, e.g. scenario_grid(fuel_diesel=[0.9, 1, 1.1], toll=[1, 1.5])."""
+    unknown = set(axes) - set(PARAMS)
+    if unknown:
+        raise ValueError(f"unknown scenario parameters: {sorted(unknown)}")
+    values = [np.atleast_1d(axes.get(p, 1.0)).astype(float) for p in PARAMS]
+    mesh   = np.meshgrid(*values, indexing="ij")
+    return pd.DataFrame(np.stack([m.ravel() for m in mesh], axis=1), columns=PARAMS)
+
+def random_scenarios(n, spread=0.2, seed=42):
+    """n scenarios with every multiplier uniform in [1-spread, 1+spread]."""
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame(rng.uniform(1 - spread, 1 + spread, (n, len(PARAMS))), columns=PARAMS)
+
+def current_assignment(cells):
+    """Share of each category's km driven by each vehicle type today (V,C)."""
+    km = cells["km"]
+    return km / np.maximum(km.sum(axis=0, keepdims=True), 1e-12)
+
+# ── Evaluation ────────────────────────────────────────────────────────────────
+def _evaluate_batch(cells, S, assignment):
+    cost_km  = np.einsum("vcp,sp->svc", cells["per_km"], S)              # (s,V,C)
+    cat_km   = cells["km"].sum(axis=0)                                    # (C,)
+    current  = np.einsum("svc,vc,c->s", cost_km, assignment, cat_km)
+    masked   = np.where(cells["eligible"], cost_km, np.inf)
+    best     = masked.argmin(axis=1)                                      # (s,C)
+    best_km  = np.take_along_axis(masked, best[:, None, :], axis=1)[:, 0, :]
+    # Categories with no eligible vehicle type keep their current cost
+    cur_km   = np.einsum("svc,vc->sc", cost_km, assignment)
+    best_km  = np.where(np.isfinite(best_km), best_km, cur_km)
+    optimal  = best_km @ cat_km
+    return current, optimal, best
+
+_WORKER_CELLS = None
+
+def _init_worker(cells, assignment):
+    global _WORKER_CELLS
+    _WORKER_CELLS = (cells, assignment)
+
+def _run_batch(S):
+    return _evaluate_batch(_WORKER_CELLS[0], S, _WORKER_CELLS[1])
+
+def evaluate(cells, scenarios, assignment=None, workers=1, batch=BATCH):
+    """Fleet cost under every scenario, for `assignment` (default: today's mix)
+    and for the cost-minimizing vehicle type per category.
+
+    Returns the scenario frame with total_cost, cost_per_km, optimal_cost,
+    saving_pct and one best_<category> column per route category (None when no
+    vehicle type is eligible there, as in optimal_assignment()).
+    """
+    frame = scenarios if isinstance(scenarios, pd.DataFrame) else pd.DataFrame(scenarios, columns=PARAMS)
+    S     = frame[PARAMS].to_numpy(float)
+    A     = current_assignment(cells) if assignment is None else np.asarray(assignment, float)
+    parts = [S[i:i + batch] for i in range(0, len(S), batch)]
+    if workers <= 1 or len(parts) == 1:
+        results = [_evaluate_batch(cells, p, A) for p in parts]
+    else:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(cells, A)) as pool:
+            results = list(pool.map(_run_batch, parts))
+    current = np.concatenate([r[0] for r in results])
+    optimal = np.concatenate([r[1] for r in results])
+    best    = np.concatenate([r[2] for r in results])
+    total_km = cells["km"].sum()
+    out = frame.copy()
+    out["total_cost"]   = current
+    out["cost_per_km"]  = current / total_km
+    out["optimal_cost"] = optimal
+    out["saving_pct"]   = (1 - optimal / current) * 100
+    vtypes = np.array(cells["vehicle_types"], dtype=object)
+    no_eligible = ~cells["eligible"].any(axis=0)        # argmin over all-inf picks index 0
+    for j, cat in enumerate(cells["categories"]):
+        out[f"best_{cat.lower()}"] = None if no_eligible[j] else vtypes[best[:, j]]
+    return out
+
+def optimal_assignment(cells, scenario=None):
+    """Cost-minimizing vehicle type per route category under one scenario (default: today's rates)."""
+    s        = scenario_vector(scenario if scenario is not None else {})
+    cost_km  = cells["per_km"] @ s                                        # (V,C)
+    cat_km   = cells["km"].sum(axis=0)
+    cur_km   = (cost_km * current_assignment(cells)).sum(axis=0)
+    masked   = np.where(cells["eligible"], cost_km, np.inf)
+    best     = masked.argmin(axis=0)
+    best_km  = masked[best, np.arange(len(best))]
+    best_km  = np.where(np.isfinite(best_km), best_km, cur_km)
+    return pd.DataFrame({
+        "route_category":    cells["categories"],
+        "km":                cat_km,
+        "current_cost_km":   cur_km,
+        "best_vehicle_type": [cells["vehicle_types"][b] if np.isfinite(masked[b, j]) else None
+                              for j, b in enumerate(best)],
+        "best_cost_km":      best_km,
+        "saving_inr":        (cur_km - best_km) * cat_km,
+    })
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="What-if cost simulator")
+    ap.add_argument("--scenarios", type=int, default=5000, help="random scenarios to evaluate")
+    ap.add_argument("--spread", type=float, default=0.25, help="± multiplier range")
+    ap.add_argument("--workers", type=int, default=1)
+    ap.add_argument("--out", default=OUT_PATH)
+    args = ap.parse_args()
+
+    master = load_master(BASE_COLS)
+    cells  = reduce_cells(master)
+    print("=== OPTIMAL VEHICLE TYPE PER ROUTE CATEGORY (current rates) ===")
+    opt = optimal_assignment(cells)
+    for r in opt.itertuples():
+        print(f"  {r.route_category:<8} {str(r.best_vehicle_type):<6} ₹{r.best_cost_km:7.2f}/km "
+              f"(today ₹{r.current_cost_km:7.2f}/km, saving ₹{r.saving_inr:,.0f})")
+
+    res = evaluate(cells, random_scenarios(args.scenarios, args.spread), workers=args.workers)
+    os.makedirs(os.path.dirname(args.out), exist_ok=True)
+    res.to_csv(args.out, index=False)
+    print(f"\n=== {len(res):,} SCENARIOS ===")
+    print(f"  Fleet cost/km  : ₹{res['cost_per_km'].min():.2f} – ₹{res['cost_per_km'].max():.2f} "
+          f"(median ₹{res['cost_per_km'].median():.2f})")
+    print(f"  Reassignment   : median saving {res['saving_pct'].median():.1f}%")
+    print(f"✅ Scenario results saved: {args.out}")
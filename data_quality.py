@@ -0,0 +1,260 @@
+"""
+Transportation Analytics System
+Data-quality rules: declarative, vectorized checks over the six sources
+
+Usage:
+    python data_quality.py [--out outputs/data_quality_report.csv]
+
+A rule is a dict (like schemas.SCHEMAS): name, source, check, severity and
+the check's parameters. Range / choice / not-null rules are generated from
+schemas.SCHEMAS; referential-integrity, duplicate and cross-field rules are
+listed in RULES. Every check returns a boolean violation mask over the
+source frame - the frames themselves are never copied or modified - and the
+rules of each source run on their own thread, sharing the frames without
+pickling. Numeric checks release the GIL; hashing object-dtype strings does
+not, which is why each string column is factorized only once.
+"""
+import argparse
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import pandas as pd
+
+from schemas import SCHEMAS, DELIVERY_STATUSES
+
+REPORT_PATH = "outputs/data_quality_report.csv"
+SCHEMA_SOURCES = {"routes": "trip", "fuel": "fuel", "delivery": "delivery"}
+KEY_COLUMNS    = ["trip_id", "vehicle_id", "driver_id"]   # shared key spaces; also label samples
+SAMPLE_SIZE    = 5
+
+def schema_rules():
+    """not_null / range / choices rules for every field in schemas.SCHEMAS."""
+    rules = []
+    for source, schema in SCHEMA_SOURCES.items():
+        for field, spec in SCHEMAS[schema].items():
+            if spec.get("required", True):
+                rules.append({"name": f"{source}.{field}.not_null", "source": source,
+                              "check": "not_null", "column": field, "severity": "error"})
+            if "min" in spec or "max" in spec:
+                rules.append({"name": f"{source}.{field}.range", "source": source, "check": "range",
+                              "column": field, "min": spec.get("min"), "max": spec.get("max"),
+                              "severity": "error"})
+            if "choices" in spec:
+                rules.append({"name": f"{source}.{field}.choices", "source": source, "check": "choices",
+                              "column": field, "choices": spec["choices"], "severity": "error"})
+    return rules
+
+RULES = schema_rules() + [
+    # Keys
+    {"name": "vehicles.vehicle_id.unique", "source": "vehicles", "check": "unique", "columns": ["vehicle_id"], "severity": "error"},
+    {"name": "drivers.driver_id.unique",   "source": "drivers",  "check": "unique", "columns": ["driver_id"],  "severity": "error"},
+    {"name": "routes.trip_id.unique",      "source": "routes",   "check": "unique", "columns": ["trip_id"],    "severity": "warning"},
+    {"name": "fuel.trip_id.unique",        "source": "fuel",     "check": "unique", "columns": ["trip_id"],    "severity": "warning"},
+    {"name": "delivery.trip_id.unique",    "source": "delivery", "check": "unique", "columns": ["trip_id"],    "severity": "warning"},
+    {"name": "maint.event.unique",         "source": "maint",    "check": "unique",
+     "columns": ["vehicle_id", "maint_date", "maint_type"], "severity": "warning"},
+    # Referential integrity
+    {"name": "routes.vehicle_id.fk",   "source": "routes",   "check": "foreign_key", "column": "vehicle_id", "ref": ["vehicles", "vehicle_id"], "severity": "error"},
+    {"name": "routes.driver_id.fk",    "source": "routes",   "check": "foreign_key", "column": "driver_id",  "ref": ["drivers", "driver_id"],   "severity": "error"},
+    {"name": "fuel.trip_id.fk",        "source": "fuel",     "check": "foreign_key", "column": "trip_id",    "ref": ["routes", "trip_id"],      "severity": "error"},
+    {"name": "delivery.trip_id.fk",    "source": "delivery", "check": "foreign_key", "column": "trip_id",    "ref": ["routes", "trip_id"],      "severity": "error"},
+    {"name": "maint.vehicle_id.fk",    "source": "maint",    "check": "foreign_key", "column": "vehicle_id", "ref": ["vehicles", "vehicle_id"], "severity": "error"},
+    {"name": "routes.trip_id.has_fuel",     "source": "routes", "check": "foreign_key", "column": "trip_id", "ref": ["fuel", "trip_id"],     "severity": "warning"},
+    {"name": "routes.trip_id.has_delivery", "source": "routes", "check": "foreign_key", "column": "trip_id", "ref": ["delivery", "trip_id"], "severity": "warning"},
+    # Other sources' ranges
+    {"name": "vehicles.base_km_per_l.range", "source": "vehicles", "check": "range", "column": "base_km_per_l", "min": 0.5, "max": 60, "severity": "error"},
+    {"name": "drivers.safety_rating.range",  "source": "drivers",  "check": "range", "column": "safety_rating", "min": 0, "max": 5, "severity": "error"},
+    {"name": "maint.maint_cost_inr.range",   "source": "maint",    "check": "range", "column": "maint_cost_inr", "min": 0, "severity": "error"},
+    # Cross-field consistency
+    {"name": "delivery.actual_ge_expected", "source": "delivery", "check": "compare",
+     "left": "actual_duration_h", "op": ">=", "right": "expected_duration_h", "tolerance": 0.01, "severity": "error"},
+    {"name": "delivery.status_vs_delay", "source": "delivery", "check": "bins", "column": "delay_minutes",
+     "target": "delivery_status", "edges": [0, 1, 30], "labels": DELIVERY_STATUSES, "severity": "error"},
+    {"name": "fuel.efficiency_consistent", "source": "fuel", "check": "ratio", "numerator": ["routes", "distance_km"],
+     "denominator": "fuel_consumed_l", "column": "fuel_efficiency_kml", "tolerance": 0.05, "severity": "warning"},
+]
+
+# ── Encoding ──────────────────────────────────────────────────────────────────
+# String columns are factorized once per source; key columns (trip/vehicle/
+# driver ids) are then aligned into one code space shared by all sources, so
+# foreign-key, duplicate and cross-source lookups are integer gathers.
+def _encode(df, col, enc):
+    if col not in enc:
+        enc[col] = pd.factorize(df[col])
+    return enc[col]
+
+def _context(sources, pool):
+    """Per-source encodings (factorized in parallel) and globally aligned key codes."""
+    names = list(sources)
+    encs  = dict(zip(names, pool.map(
+        lambda n: {c: pd.factorize(sources[n][c]) for c in KEY_COLUMNS if c in sources[n]}, names)))
+    ctx = {"enc": encs, "keys": {}, "key_space": {}}
+    for col in KEY_COLUMNS:
+        have = [n for n in names if col in encs[n]]
+        if not have:
+            continue
+        _, space = pd.factorize(np.concatenate([np.asarray(encs[n][col][1], dtype=object) for n in have]))
+        ctx["key_space"][col] = len(space)
+        for n in have:
+            codes, uniq = encs[n][col]
+            to_global = np.append(pd.Index(space).get_indexer(uniq), -1)   # local -1 stays -1
+            ctx["keys"][(n, col)] = to_global[codes]
+    return ctx
+
+def _present(ctx, src, col):
+    """Boolean membership over the shared key space for sources[src][col]."""
+    codes = ctx["keys"][(src, col)]
+    have  = np.zeros(ctx["key_space"][col], dtype=bool)
+    have[codes[codes >= 0]] = True
+    return have
+
+# ── Checks: (frame, rule, ctx, enc) -> boolean violation mask ─────────────────
+def _not_null(df, rule, ctx, enc):
+    if rule["column"] in enc:                    # already factorized: missing is code -1
+        return enc[rule["column"]][0] < 0
+    return df[rule["column"]].isna().to_numpy()
+
+def _range(df, rule, ctx, enc):
+    x = df[rule["column"]].to_numpy(float)
+    bad = np.zeros(len(x), dtype=bool)
+    if rule.get("min") is not None: bad |= x < rule["min"]
+    if rule.get("max") is not None: bad |= x > rule["max"]
+    return bad                                   # NaN compares False: left to not_null
+
+def _choices(df, rule, ctx, enc):
+    codes, uniq = _encode(df, rule["column"], enc)
+    bad = np.append(~pd.Index(uniq).isin(rule["choices"]), False)   # code -1 (missing) is fine
+    return bad[codes]
+
+def _unique(df, rule, ctx, enc):
+    cols = rule["columns"]
+    if len(cols) == 1 and (rule["source"], cols[0]) in ctx["keys"]:
+        return pd.Series(ctx["keys"][(rule["source"], cols[0])]).duplicated().to_numpy()
+    return df.duplicated(subset=cols, keep="first").to_numpy()
+
+def _foreign_key(df, rule, ctx, enc):
+    codes = ctx["keys"][(rule["source"], rule["column"])]
+    have  = _present(ctx, *rule["ref"])
+    return (codes >= 0) & ~have[np.maximum(codes, 0)]
+
+def _compare(df, rule, ctx, enc):
+    diff = df[rule["left"]].to_numpy(float) - df[rule["right"]].to_numpy(float)
+    tol  = rule.get("tolerance", 0.0)
+    ok = {">=": diff >= -tol, ">": diff > 0, "<=": diff <= tol, "<": diff < 0,
+          "==": np.abs(diff) <= tol}[rule["op"]]
+    return ~ok & ~np.isnan(diff)
+
+def _bins(df, rule, ctx, enc):
+    x    = df[rule["column"]].to_numpy(float)
+    exp  = np.searchsorted(rule["edges"], x, side="right") - 1     # -1: below the first edge
+    codes, uniq = _encode(df, rule["target"], enc)
+    got  = np.append(pd.Index(rule["labels"]).get_indexer(uniq), -1)[codes]
+    return ~np.isnan(x) & (got >= 0) & (exp != got)
+
+def _ratio(df, rule, ctx, enc):
+    src, col = rule["numerator"]
+    ref_codes = ctx["keys"][(src, "trip_id")]
+    by_trip   = np.full(ctx["key_space"]["trip_id"] + 1, np.nan)   # last slot: unknown trip
+    ok = ref_codes >= 0
+    by_trip[ref_codes[ok][::-1]] = ctx["sources"][src][col].to_numpy(float)[ok][::-1]  # first row wins
+    num = by_trip[ctx["keys"][(rule["source"], "trip_id")]]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        expected = num / df[rule["denominator"]].to_numpy(float)
+        rel = np.abs(df[rule["column"]].to_numpy(float) - expected) / np.abs(expected)
+    return rel > rule.get("tolerance", 0.0)                      # NaN (missing inputs) -> False
+
+CHECKS = {"not_null": _not_null, "range": _range, "choices": _choices, "unique": _unique,
+          "foreign_key": _foreign_key, "compare": _compare, "bins": _bins, "ratio": _ratio}
+
+def _rule_columns(rule):
+    cols = [rule[k] for k in ("column", "left", "right", "target", "denominator") if k in rule]
+    cols += rule.get("columns", [])
+    if rule["check"] == "ratio":
+        cols.append("trip_id")
+    return cols
+
+def _missing(rule, ctx):
+    df = ctx["sources"][rule["source"]]
+    missing = [c for c in _rule_columns(rule) if c not in df.columns]
+    if rule["check"] == "foreign_key" and tuple(rule["ref"]) not in ctx["keys"]:
+        missing.append(".".join(rule["ref"]))
+    if rule["check"] == "ratio":
+        src, col = rule["numerator"]
+        if (src, "trip_id") not in ctx["keys"] or col not in ctx["sources"][src]:
+            missing.append(f"{src}.{col}")
+    return missing
+
+# ── Engine ────────────────────────────────────────────────────────────────────
+def violation_mask(sources, rule, ctx=None):
+    """Row mask of `rule`'s violations in sources[rule["source"]] (drill-down helper)."""
+    if ctx is None:
+        with ThreadPoolExecutor() as pool:
+            ctx = {**_context(sources, pool), "sources": sources}
+    src = rule["source"]
+    return CHECKS[rule["check"]](sources[src], rule, ctx, dict(ctx["enc"][src]))
+
+def _sample(df, mask):
+    rows = np.flatnonzero(mask)[:SAMPLE_SIZE]
+    key  = next((c for c in KEY_COLUMNS if c in df.columns), None)
+    vals = df[key].iloc[rows] if key else rows
+    return ",".join(map(str, vals))
+
+def _run_source(src, rules, ctx):
+    df, enc, out = ctx["sources"][src], dict(ctx["enc"][src]), []
+    for r in rules:
+        row = {"rule": r["name"], "source": src, "check": r["check"],
+               "severity": r["severity"], "rows": len(df)}
+        missing = _missing(r, ctx)
+        if missing:
+            out.append({**row, "violations": None, "pct": None, "sample": f"skipped: missing {missing}"})
+            continue
+        mask = CHECKS[r["check"]](df, r, ctx, enc)
+        n = int(mask.sum())
+        out.append({**row, "violations": n, "pct": round(100 * n / max(len(df), 1), 3),
+                    "sample": _sample(df, mask) if n else ""})
+    return out
+
+def run_rules(sources, rules=RULES, workers=None):
+    """Evaluate `rules` against `sources` ({name: DataFrame}); one thread per source.
+    Returns the compact report (one row per rule)."""
+    groups = {}
+    for r in rules:
+        if r["source"] in sources:
+            groups.setdefault(r["source"], []).append(r)
+    with ThreadPoolExecutor(max_workers=workers or len(sources) or 1) as pool:
+        ctx  = {**_context(sources, pool), "sources": sources}
+        futures = [pool.submit(_run_source, src, rs, ctx) for src, rs in groups.items()]
+        rows = [row for f in futures for row in f.result()]
+    return pd.DataFrame(rows, columns=["rule", "source", "check", "severity", "rows",
+                                       "violations", "pct", "sample"])
+
+def print_report(report):
+    failed  = report[report["violations"].fillna(0) > 0]
+    skipped = report["violations"].isna().sum()
+    print(f"  Rules: {len(report)} checked, {len(failed)} with violations"
+          + (f", {skipped} skipped" if skipped else ""))
+    for r in failed.itertuples():
+        mark = "✗" if r.severity == "error" else "!"
+        print(f"  {mark} {r.rule:<34} {int(r.violations):>6} rows ({r.pct:.2f}%)  e.g. {r.sample}")
+
+def load_sources():
+    with open("data/delivery_timelines.json") as f:
+        delivery = pd.DataFrame(json.load(f))
+    return {"vehicles": pd.read_csv("data/vehicles.csv"),
+            "drivers":  pd.read_csv("data/drivers.csv"),
+            "routes":   pd.read_csv("data/route_logs.csv", parse_dates=["trip_date"]),
+            "fuel":     pd.read_excel("data/fuel_logs.xlsx"),
+            "delivery": delivery,
+            "maint":    pd.read_csv("data/maintenance_history.csv", parse_dates=["maint_date"])}
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Run the data-quality rules on the raw sources")
+    ap.add_argument("--out", default=REPORT_PATH)
+    args = ap.parse_args()
+    report = run_rules(load_sources())
+    print("=== DATA QUALITY RULES ===")
+    print_report(report)
+    os.makedirs(os.path.dirname(args.out) or ".", exist_ok=True)
+    report.to_csv(args.out, index=False)
+    print(f"✅ Report saved: {args.out}")
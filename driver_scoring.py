@@ -0,0 +1,78 @@
+"""
+Transportation Analytics System
+Driver scoring: per-driver rollups, percentile ranks, top-k / bottom-20% and medals
+
+All rollups come from one factorize + bincount pass over the trip rows; the
+top-k set uses np.argpartition, so only k rows are ever sorted.
+"""
+import numpy as np
+import pandas as pd
+
+# output column -> master column (per-driver trip means)
+MEAN_METRICS = {
+    "perf_score":  "driver_perf_score",
+    "avg_eff":     "fuel_efficiency_kml",
+    "avg_delay":   "delay_minutes",
+    "avg_cost_km": "cost_per_km",
+    "safety":      "safety_rating",
+    "exp":         "experience_years",
+}
+MEDALS = ["Gold", "Silver", "Bronze"]
+
+def top_k_positions(values, k):
+    """Positions of the k largest values, best first (partial selection + sort of k)."""
+    n = len(values)
+    k = min(k, n)
+    if k <= 0:
+        return np.array([], dtype=np.int64)
+    part = np.argpartition(-values, k - 1)[:k] if k < n else np.arange(n)
+    return part[np.argsort(-values[part], kind="stable")]
+
+def driver_scores(master, key="driver_name", top_k=10, bottom_frac=0.2):
+    """Score every driver in one vectorized pass.
+
+    Returns dict with
+      table            : one row per driver (trips, means, on_time_pct, total_distance,
+                         rank, pct_rank, medal, bottom)
+      top              : top_k rows of `table`, best first
+      bottom           : drivers below the bottom_frac quantile of perf_score
+      bottom_threshold : that quantile (same interpolation as pandas .quantile)
+    """
+    codes, names = pd.factorize(master[key], sort=True)
+    n     = len(names)
+    trips = np.bincount(codes, minlength=n).astype(float)
+
+    table = pd.DataFrame({key: names, "trips": trips.astype(int)})
+    for out_col, src in MEAN_METRICS.items():
+        table[out_col] = np.bincount(codes, weights=master[src].to_numpy(float), minlength=n) / trips
+    on_time = (master["delivery_status"] == "On Time").to_numpy(float)
+    table["on_time_pct"]    = np.bincount(codes, weights=on_time, minlength=n) / trips * 100
+    table["total_distance"] = np.bincount(codes, weights=master["distance_km"].to_numpy(float), minlength=n)
+
+    # Ranks / percentiles from the sorted score vector (no frame sort)
+    scores  = table["perf_score"].to_numpy()
+    ordered = np.sort(scores)
+    table["rank"]     = n - np.searchsorted(ordered, scores, side="right") + 1
+    table["pct_rank"] = np.searchsorted(ordered, scores, side="right") / max(n, 1) * 100
+
+    top = top_k_positions(scores, max(top_k, len(MEDALS)))
+    medal = np.full(n, None, dtype=object)
+    medal[top[:len(MEDALS)]] = MEDALS[:len(top[:len(MEDALS)])]
+    table["medal"] = medal
+
+    threshold = float(np.quantile(scores, bottom_frac)) if n else float("nan")
+    table["bottom"] = scores < threshold
+
+    return {
+        "table":            table,
+        "top":              table.iloc[top[:top_k]].reset_index(drop=True),
+        "bottom":           table[table["bottom"]].reset_index(drop=True),
+        "bottom_threshold": threshold,
+    }
+
+def leaderboard(table):
+    """Full display ordering (best first) with sequential 1..n positions."""
+    order = np.argsort(-table["perf_score"].to_numpy(), kind="stable")
+    lb = table.iloc[order].reset_index(drop=True)
+    lb.insert(0, "position", np.arange(1, len(lb) + 1))
+    return lb
@@ -5,6 +5,12 @@ Step 2: ETL + Build Unified Master Analytics Table
 import pandas as pd
 import numpy as np
 import json
+import os
+from master_store import write_partitions, PARTITION_ROOT
+from column_cache import write_cache, CACHE_DIR
+from maintenance import attribute_maint_cost
+from fleet_stats import cached_stats, STATS_DIR
+from data_quality import run_rules, print_report, REPORT_PATH as DQ_REPORT_PATH
 
 # ── Load all sources ──────────────────────────────────────────────────────────
 vehicles  = pd.read_csv("data/vehicles.csv")
@@ -15,9 +21,27 @@ with open("data/delivery_timelines.json") as f:
     delivery = pd.DataFrame(json.load(f))
 maint     = pd.read_csv("data/maintenance_history.csv", parse_dates=["maint_date"])
 
+# ── Append live-ingested events (ingest_service.py micro-batches) ─────────────
+LIVE_DIR = "data/live"
+if os.path.exists(f"{LIVE_DIR}/trip.csv"):
+    live = pd.read_csv(f"{LIVE_DIR}/trip.csv", parse_dates=["trip_date"])
+    routes = pd.concat([routes, live[~live["trip_id"].isin(routes["trip_id"])]], ignore_index=True)
+if os.path.exists(f"{LIVE_DIR}/fuel.csv"):
+    live = pd.read_csv(f"{LIVE_DIR}/fuel.csv").drop(columns=["fuel_efficiency_kml"])
+    live = live[live["trip_id"].isin(routes["trip_id"]) & ~live["trip_id"].isin(fuel["trip_id"])]
+    fuel = pd.concat([fuel, live], ignore_index=True)
+if os.path.exists(f"{LIVE_DIR}/delivery.csv"):
+    live = pd.read_csv(f"{LIVE_DIR}/delivery.csv")
+    delivery = pd.concat([delivery, live[~live["trip_id"].isin(delivery["trip_id"])]], ignore_index=True)
+
 print("=== DATA QUALITY REPORT (Pre-clean) ===")
 for name, df in [("Vehicles",vehicles),("Drivers",drivers),("Routes",routes),("Fuel",fuel),("Delivery",delivery),("Maint",maint)]:
     print(f"  {name}: {df.shape[0]} rows, {df.isnull().sum().sum()} nulls")
+dq_report = run_rules({"vehicles": vehicles, "drivers": drivers, "routes": routes,
+                       "fuel": fuel, "delivery": delivery, "maint": maint})
+print_report(dq_report)
+os.makedirs(os.path.dirname(DQ_REPORT_PATH), exist_ok=True)
+dq_report.to_csv(DQ_REPORT_PATH, index=False)
 
 # ── Data Cleaning ─────────────────────────────────────────────────────────────
 # Fill missing categoricals with mode
@@ -53,14 +77,24 @@ master = master.merge(maint_agg,on="vehicle_id", how="left")
 master.rename(columns={"avg_speed_kmph_x":"avg_speed_kmph"}, inplace=True)
 
 # ── Derived Features ──────────────────────────────────────────────────────────
-# Toll + labour cost estimation
+# Toll + labour cost estimation; the per-trip rates are drawn from a hash of the
+# trip_id so a rebuild reproduces them and unchanged months keep their fingerprint
+def trip_uniform(lo, hi, salt):
+    h = pd.util.hash_pandas_object(master["trip_id"], index=False, hash_key=salt).to_numpy()
+    return lo + (hi - lo) * ((h >> np.uint64(11)) / float(1 << 53))
+
 master["toll_cost_inr"]   = np.where(master["route_category"].isin(["Highway","Mixed"]),
-                                      master["distance_km"] * np.random.uniform(1.5, 4, len(master)), 0)
-master["labour_cost_inr"] = master["actual_duration_h"] * np.random.uniform(150, 300, len(master))
+                                      master["distance_km"] * trip_uniform(1.5, 4, "toll-rate-000000"), 0)
+master["labour_cost_inr"] = master["actual_duration_h"] * trip_uniform(150, 300, "labour-rate-0000")
+# Maintenance: each service's cost spread over the km driven since the previous one;
+# trips after a vehicle's last service carry an estimate at its historical rate
+maint_alloc = attribute_maint_cost(master, maint)
+master["maint_alloc_inr"] = maint_alloc["maint_alloc_inr"].to_numpy()
+master["maint_basis"]     = maint_alloc["maint_basis"].to_numpy()
 master["total_trip_cost_inr"] = (master["fuel_cost_inr"] +
                                   master["toll_cost_inr"] +
                                   master["labour_cost_inr"] +
-                                  master["total_maint_cost_inr"].fillna(0) / master["maint_count"].fillna(1))
+                                  master["maint_alloc_inr"])
 master["cost_per_km"]     = (master["total_trip_cost_inr"] / master["distance_km"]).round(2)
 
 # Driver performance score (higher = better)
@@ -87,11 +121,13 @@ MASTER_COLS = [
     "road_difficulty","difficulty_tier","traffic_level","weather",
     "delay_minutes","delivery_status","expected_duration_h","actual_duration_h",
     "total_maint_cost_inr","maint_count","avg_downtime_h",
-    "toll_cost_inr","labour_cost_inr","total_trip_cost_inr","cost_per_km",
+    "maint_alloc_inr","maint_basis","toll_cost_inr","labour_cost_inr","total_trip_cost_inr","cost_per_km",
     "driver_perf_score","safety_rating","experience_years",
     "vehicle_type","fuel_type","year_mfg","base_km_per_l","capacity_kg",
     "customer_location","avg_speed_kmph",
 ]
+# Telematics fields, present once gps_stream.py has enriched route_logs
+MASTER_COLS += [c for c in ["idle_time_min","harsh_brake_count"] if c in master.columns]
 master = master[MASTER_COLS].copy()
 master.fillna({"total_maint_cost_inr":0,"maint_count":0,"avg_downtime_h":0}, inplace=True)
 
@@ -99,6 +135,16 @@ master.to_csv("data/master_analytics_table.csv", index=False)
 print(f"\n✅ Master table built: {master.shape[0]} rows × {master.shape[1]} cols")
 print(f"   Nulls remaining: {master.isnull().sum().sum()}")
 
+# Date-partitioned copy (year/month); only months whose rows changed are rewritten
+written = write_partitions(master)
+print(f"   Partitions written: {len(written)} -> {PARTITION_ROOT}/")
+# Memory-mapped column cache for fast report start-up
+write_cache(master)
+print(f"   Column cache      : {CACHE_DIR}/")
+# Correlations / moments for the report builds, keyed by the master data version
+cached_stats()
+print(f"   Statistics cache  : {STATS_DIR}/")
+
 # ── Quick Stats ───────────────────────────────────────────────────────────────
 print("\n=== SUMMARY STATISTICS ===")
 print(f"  Avg fuel efficiency : {master['fuel_efficiency_kml'].mean():.2f} km/l")
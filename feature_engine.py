@@ -0,0 +1,119 @@
+"""
+Transportation Analytics System
+Step 2b: Rolling-window time-series features per vehicle and per driver
+
+For every trip: trailing 7/30/90-day fuel efficiency (km/L), mean delay and
+cost/km for its vehicle and its driver, plus the vehicle's trailing
+maintenance spend. Windows are (trip_date - w, trip_date] and include the
+trip itself.
+
+Each key is handled in one vectorized pass: rows are sorted by (key, time),
+window bounds come from np.searchsorted on a composite (key, seconds) array,
+and window sums are differences of prefix sums.
+"""
+import os
+import numpy as np
+import pandas as pd
+
+WINDOWS       = (7, 30, 90)
+FEATURES_PATH = "data/trip_features.csv"
+KEYS          = {"veh": "vehicle_id", "drv": "driver_id"}
+
+# ── Vectorized window sums ────────────────────────────────────────────────────
+def _composite(codes, secs):
+    """(key, seconds) packed into one sortable int64; seconds must stay < 2**34."""
+    return (codes.astype(np.int64) << 34) | secs.astype(np.int64)
+
+def _trailing_sums(event_key, event_vals, query_key, width_s):
+    """Sums of event_vals (n x m) whose composite key lies in (q - width, q]
+    for each query q, skipping NaNs. event_key must be sorted ascending.
+
+    Returns (sums, per-column non-NaN counts, events in window). NaNs enter the
+    prefix sums as 0 with a separate prefix count, so one missing value cannot
+    poison every later window of every key."""
+    valid = ~np.isnan(event_vals)
+    zero  = np.zeros((1, event_vals.shape[1]))
+    csum  = np.vstack([zero, np.cumsum(np.nan_to_num(event_vals), axis=0)])
+    ccnt  = np.vstack([zero, np.cumsum(valid, axis=0)])
+    hi = np.searchsorted(event_key, query_key, side="right")
+    lo = np.searchsorted(event_key, query_key - width_s, side="right")
+    return csum[hi] - csum[lo], ccnt[hi] - ccnt[lo], hi - lo
+
+def _seconds(dates, origin):
+    return ((dates - origin) // pd.Timedelta(seconds=1)).to_numpy(np.int64)
+
+# ── Feature computation ───────────────────────────────────────────────────────
+def rolling_features(trips, maint=None, windows=WINDOWS):
+    """Rolling features for `trips` (needs trip_id, vehicle_id, driver_id, trip_date,
+    distance_km, fuel_consumed_l, delay_minutes, total_trip_cost_inr).
+    Returns a frame aligned row-for-row with `trips`."""
+    dates  = pd.to_datetime(trips["trip_date"])
+    origin = dates.min() - pd.Timedelta(days=max(windows))
+    if maint is not None and len(maint):
+        origin = min(origin, pd.to_datetime(maint["maint_date"]).min())
+    secs = _seconds(dates, origin)
+    km    = trips["distance_km"].to_numpy(float)
+    fuel  = trips["fuel_consumed_l"].to_numpy(float)
+    cost  = trips["total_trip_cost_inr"].to_numpy(float)
+    # Ratio features only use trips where both numerator and denominator are known
+    pair  = lambda a, b: np.where(np.isnan(b), np.nan, a)
+    vals  = np.column_stack([pair(km, fuel), pair(fuel, km),
+                             trips["delay_minutes"].to_numpy(float),
+                             pair(cost, km), pair(km, cost)])
+
+    out = pd.DataFrame({"trip_id": trips["trip_id"].to_numpy()}, index=trips.index)
+    for prefix, col in KEYS.items():
+        codes, uniques = pd.factorize(trips[col], sort=True)
+        comb  = _composite(codes, secs)
+        order = np.argsort(comb, kind="stable")
+        sorted_comb = comb[order]
+        for w in windows:
+            sums, cnt, n = _trailing_sums(sorted_comb, vals[order], comb, w * 86400)
+            sums[cnt == 0] = np.nan
+            eff_km, litres, delay, cost, cost_km = sums.T
+            with np.errstate(divide="ignore", invalid="ignore"):
+                out[f"{prefix}_eff_{w}d"]     = np.round(eff_km / litres, 3)
+                out[f"{prefix}_delay_{w}d"]   = np.round(delay / cnt[:, 2], 2)
+                out[f"{prefix}_cost_km_{w}d"] = np.round(cost / cost_km, 2)
+            out[f"{prefix}_trips_{w}d"] = n
+
+        if prefix == "veh" and maint is not None:
+            m = maint[maint["vehicle_id"].isin(uniques)]
+            m_codes = pd.Index(uniques).get_indexer(m["vehicle_id"])
+            m_comb  = _composite(m_codes, _seconds(pd.to_datetime(m["maint_date"]), origin))
+            m_order = np.argsort(m_comb, kind="stable")
+            m_vals  = m["maint_cost_inr"].to_numpy(float)[m_order][:, None]
+            for w in windows:
+                spend, _, _ = _trailing_sums(m_comb[m_order], m_vals, comb, w * 86400)
+                out[f"veh_maint_spend_{w}d"] = np.round(spend[:, 0], 2)
+    return out
+
+def update_features(features, trips, maint=None, windows=WINDOWS):
+    """Incrementally add features for trips not yet present in `features`.
+
+    Only trips inside the longest window before the earliest new trip are
+    re-read as context; rows dated on/after that trip (new trips plus any
+    history they affect when they arrive late) are recomputed, everything
+    older is kept as-is.
+    """
+    new = ~trips["trip_id"].isin(features["trip_id"])
+    if not new.any():
+        return features
+    dates   = pd.to_datetime(trips["trip_date"])
+    first   = dates[new].min()
+    horizon = first - pd.Timedelta(days=max(windows))
+    ctx     = trips[dates > horizon]
+    fresh   = rolling_features(ctx, maint, windows)
+    fresh   = fresh[pd.to_datetime(ctx["trip_date"]) >= first]
+    kept    = features[~features["trip_id"].isin(fresh["trip_id"])]
+    return pd.concat([kept, fresh], ignore_index=True)
+
+if __name__ == "__main__":
+    master = pd.read_csv("data/master_analytics_table.csv", parse_dates=["trip_date"])
+    maint  = pd.read_csv("data/maintenance_history.csv", parse_dates=["maint_date"])
+    if os.path.exists(FEATURES_PATH):
+        features = update_features(pd.read_csv(FEATURES_PATH), master, maint)
+    else:
+        features = rolling_features(master, maint)
+    features.to_csv(FEATURES_PATH, index=False)
+    print(f"✅ Trip features saved: {FEATURES_PATH} ({features.shape[0]} rows × {features.shape[1]} cols)")
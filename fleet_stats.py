@@ -0,0 +1,350 @@
+"""
+Transportation Analytics System
+Fleet statistics: mergeable moments, Pearson / Spearman correlations with
+confidence intervals, per-segment correlations
+
+Usage:
+    python fleet_stats.py [--workers 4] [--refresh]
+
+Each partition (or row chunk of an in-memory frame) is reduced to a Moments
+accumulator - count, means, centered cross-products and per-column third /
+fourth moments - and the accumulators are merged pairwise, so the result is
+the same however the rows are split and partitions can be processed in
+parallel. Spearman ranks come from merged per-column histograms: STAT_BINS
+linear bins over the observed range, then up to SPEARMAN_REFINE passes that
+split every crowded bin across the values it actually holds, so skewed
+columns are not folded into a handful of bins. Each value gets the mid-rank
+of its bin and Pearson on those ranks is accumulated the same way.
+
+Binned ranks are the exact ranks averaged within each bin, so the error is
+known from the final counts alone: "spearman_err" bounds |rho - exact rho|
+per pair (bins holding a single repeated value are exact ties and add
+nothing) and "spearman_ci" is widened by it.
+
+Results are stored under data/stats_cache/ keyed by the master data version
+(column_cache.current_version), so report builds read finished matrices
+instead of recomputing, and any change to the master invalidates them. The
+partitions are the source only while they mirror that version; otherwise the
+columns are read from the column cache.
+"""
+import argparse
+import hashlib
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from statistics import NormalDist
+import numpy as np
+import pandas as pd
+
+from column_cache import load_master, current_version, CACHE_DIR, MASTER_CSV
+from master_store import list_partitions, partition_path, store_version, PART_FILE, PARTITION_ROOT
+
+STATS_DIR  = "data/stats_cache"
+STAT_COLS  = ["distance_km", "fuel_consumed_l", "fuel_efficiency_kml", "road_difficulty",
+              "delay_minutes", "total_trip_cost_inr", "cost_per_km", "driver_perf_score",
+              "experience_years"]
+SEGMENTS   = ["route_category", "vehicle_type"]
+STAT_BINS  = 4096
+SPEARMAN_REFINE = 4      # max extra histogram passes splitting crowded bins
+CHUNK_ROWS = 1_000_000   # row chunk size when the source is an in-memory frame
+
+# ── Mergeable accumulator ─────────────────────────────────────────────────────
+class Moments:
+    """Count, mean, co-moment matrix and per-column M3/M4/min/max for p columns.
+
+    Rows with a missing value in any column are skipped (listwise deletion).
+    merge() uses the pairwise update formulas (Chan et al. / Pebay), which
+    stay accurate where raw sums of squares would cancel."""
+    def __init__(self, p):
+        self.n    = 0
+        self.mean = np.zeros(p)
+        self.C    = np.zeros((p, p))
+        self.M3   = np.zeros(p)
+        self.M4   = np.zeros(p)
+        self.lo   = np.full(p, np.inf)
+        self.hi   = np.full(p, -np.inf)
+
+    @classmethod
+    def from_array(cls, X, higher=True):
+        """Accumulator for the rows of X; higher=False skips M3/M4 (correlation only)."""
+        bad = np.isnan(X).any(axis=1)
+        if bad.any():
+            X = X[~bad]
+        acc = cls(X.shape[1])
+        if not len(X):
+            return acc
+        acc.n    = len(X)
+        acc.mean = X.mean(axis=0)
+        D        = X - acc.mean
+        acc.C    = D.T @ D
+        if higher:
+            D2     = D * D
+            acc.M3 = (D2 * D).sum(axis=0)
+            acc.M4 = (D2 * D2).sum(axis=0)
+        acc.lo, acc.hi = X.min(axis=0), X.max(axis=0)
+        return acc
+
+    def merge(self, other):
+        na, nb = self.n, other.n
+        if nb == 0:
+            return self
+        if na == 0:
+            self.__dict__.update({k: np.copy(v) if isinstance(v, np.ndarray) else v
+                                  for k, v in other.__dict__.items()})
+            return self
+        n  = na + nb
+        d  = other.mean - self.mean
+        M2a, M2b = np.diag(self.C), np.diag(other.C)
+        self.M4 = (self.M4 + other.M4 + d**4 * na * nb * (na*na - na*nb + nb*nb) / n**3
+                   + 6 * d**2 * (na*na * M2b + nb*nb * M2a) / n**2
+                   + 4 * d * (na * other.M3 - nb * self.M3) / n)
+        self.M3 = (self.M3 + other.M3 + d**3 * na * nb * (na - nb) / n**2
+                   + 3 * d * (na * M2b - nb * M2a) / n)
+        self.C    = self.C + other.C + np.outer(d, d) * na * nb / n
+        self.mean = self.mean + d * nb / n
+        self.lo, self.hi = np.minimum(self.lo, other.lo), np.maximum(self.hi, other.hi)
+        self.n = n
+        return self
+
+    def std(self):
+        return np.sqrt(np.diag(self.C) / max(self.n - 1, 1))
+
+    def corr(self):
+        s = np.sqrt(np.diag(self.C))
+        with np.errstate(divide="ignore", invalid="ignore"):
+            r = self.C / np.outer(s, s)
+        np.fill_diagonal(r, 1.0)
+        return np.clip(r, -1, 1)
+
+    def skew(self):
+        """Sample skewness, bias-corrected as in pandas."""
+        n  = self.n
+        m2 = np.diag(self.C) / max(n, 1)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            g1 = (self.M3 / max(n, 1)) / m2**1.5
+            return g1 * np.sqrt(n * (n - 1)) / (n - 2) if n > 2 else np.full_like(g1, np.nan)
+
+    def kurtosis(self):
+        """Sample excess kurtosis, bias-corrected as in pandas."""
+        n  = self.n
+        m2 = np.diag(self.C) / max(n, 1)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            g2 = (self.M4 / max(n, 1)) / m2**2 - 3
+            return ((n + 1) * g2 + 6) * (n - 1) / ((n - 2) * (n - 3)) if n > 3 else np.full_like(g2, np.nan)
+
+def merge_all(accs, p):
+    out = Moments(p)
+    for a in accs:
+        out.merge(a)
+    return out
+
+def fisher_ci(r, n, level=0.95, spearman=False):
+    """Confidence interval for correlation(s) r via the Fisher z-transform.
+    Spearman uses the Fieller et al. variance 1.06 / (n - 3)."""
+    r  = np.asarray(r, dtype=float)
+    if n <= 3:
+        return np.full_like(r, -1.0), np.full_like(r, 1.0)
+    z  = np.arctanh(np.clip(r, -0.9999999, 0.9999999))
+    se = np.sqrt((1.06 if spearman else 1.0) / (n - 3))
+    q  = NormalDist().inv_cdf(0.5 + level / 2)
+    lo, hi = np.tanh(z - q * se), np.tanh(z + q * se)
+    exact = np.abs(r) >= 1
+    return np.where(exact, r, lo), np.where(exact, r, hi)
+
+# ── Per-chunk passes (run in worker processes) ────────────────────────────────
+def _load(task, columns):
+    if isinstance(task, pd.DataFrame):
+        return task
+    return pd.read_csv(task, usecols=columns)
+
+def _moments_pass(args):
+    task, columns, segments = args
+    df = _load(task, columns + segments)
+    X  = df[columns].to_numpy(float)
+    segs = {}
+    for seg in segments:
+        codes, values = pd.factorize(df[seg])
+        order = np.argsort(codes, kind="stable")
+        bounds = np.searchsorted(codes[order], np.arange(len(values) + 1))
+        segs[seg] = {str(v): Moments.from_array(X[order[bounds[i]:bounds[i + 1]]], higher=False)
+                     for i, v in enumerate(values)}
+    return Moments.from_array(X), segs
+
+def _bin(X, edges):
+    return np.stack([np.searchsorted(e, X[:, j], side="right") for j, e in enumerate(edges)], axis=1)
+
+def _hist_pass(args):
+    task, columns, edges = args
+    X  = _load(task, columns)[columns].to_numpy(float)
+    X  = X[~np.isnan(X).any(axis=1)]
+    B  = _bin(X, edges)
+    out = []
+    for j, e in enumerate(edges):
+        size = len(e) + 1
+        lo, hi = np.full(size, np.inf), np.full(size, -np.inf)
+        np.minimum.at(lo, B[:, j], X[:, j])
+        np.maximum.at(hi, B[:, j], X[:, j])
+        out.append((np.bincount(B[:, j], minlength=size), lo, hi))
+    return out
+
+def _merge_hists(hists):
+    """Per-column (counts, min, max) summed / reduced over all chunks."""
+    merged = hists[0]
+    for h in hists[1:]:
+        merged = [(c + c2, np.minimum(lo, lo2), np.maximum(hi, hi2))
+                  for (c, lo, hi), (c2, lo2, hi2) in zip(merged, h)]
+    return merged
+
+def _refine(edges, hist, target):
+    """Split bins holding more than `target` rows across their observed range;
+    None when no bin can be split further."""
+    out, split = [], False
+    for e, (counts, lo, hi) in zip(edges, hist):
+        crowded = np.flatnonzero((counts > target) & (hi > lo))
+        if not len(crowded):
+            out.append(e)
+            continue
+        split = True
+        extra = [np.linspace(lo[b], hi[b], min(int(np.ceil(counts[b] / target)) * 4, 65536) + 1)[1:]
+                 for b in crowded]
+        out.append(np.unique(np.concatenate([e] + extra)))
+    return out if split else None
+
+def _rank_error(hist, n):
+    """Share of each column's rank variance lost to binning: sum c(c²-1) / n(n²-1)
+    over bins holding more than one distinct value."""
+    loss = np.array([np.sum(np.where(hi > lo, c * (c * c - 1.0), 0.0)) for c, lo, hi in hist])
+    return loss / max(n * (n * n - 1.0), 1.0)
+
+def _rank_pass(args):
+    task, columns, edges, midranks = args
+    X  = _load(task, columns)[columns].to_numpy(float)
+    X  = X[~np.isnan(X).any(axis=1)]
+    B  = _bin(X, edges)
+    R  = np.stack([midranks[j][B[:, j]] for j in range(len(columns))], axis=1)
+    return Moments.from_array(R, higher=False)
+
+def _run(fn, tasks, workers):
+    # In-memory chunks stay in-process: shipping them to workers costs more than it saves
+    if workers <= 1 or len(tasks) <= 1 or isinstance(tasks[0][0], pd.DataFrame):
+        return [fn(t) for t in tasks]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(fn, tasks))
+
+# ── Public API ────────────────────────────────────────────────────────────────
+def _tasks(source, root):
+    if isinstance(source, pd.DataFrame):
+        return [source.iloc[i:i + CHUNK_ROWS] for i in range(0, max(len(source), 1), CHUNK_ROWS)]
+    return [os.path.join(partition_path(*p, root=root), PART_FILE) for p in list_partitions(root)]
+
+def compute_stats(source=None, columns=STAT_COLS, segments=SEGMENTS, spearman=True,
+                  workers=1, bins=STAT_BINS, root=PARTITION_ROOT):
+    """Statistics for a DataFrame, or for every partition under `root` when
+    source is None (partitions are read and reduced by `workers` processes).
+    Returns a JSON-serialisable dict (see corr_frame())."""
+    columns, segments = list(columns), list(segments)
+    tasks = _tasks(source, root)
+    p     = len(columns)
+    parts = _run(_moments_pass, [(t, columns, segments) for t in tasks], workers)
+    total = merge_all([m for m, _ in parts], p)
+
+    segs = {}
+    for seg in segments:
+        merged = {}
+        for _, s in parts:
+            for value, acc in s[seg].items():
+                merged.setdefault(value, Moments(p)).merge(acc)
+        segs[seg] = {v: {"n": a.n, "pearson": a.corr().round(6).tolist()}
+                     for v, a in sorted(merged.items())}
+
+    lo, hi = fisher_ci(total.corr(), total.n)
+    stats = {
+        "columns": columns, "n": total.n,
+        "summary": {c: {"mean": float(total.mean[j]), "std": float(total.std()[j]),
+                        "min": float(total.lo[j]), "max": float(total.hi[j]),
+                        "skew": float(total.skew()[j]), "kurtosis": float(total.kurtosis()[j])}
+                    for j, c in enumerate(columns)},
+        "pearson": total.corr().round(6).tolist(),
+        "pearson_ci": [lo.round(6).tolist(), hi.round(6).tolist()],
+        "segments": segs,
+    }
+    if spearman and total.n:
+        edges  = [np.linspace(lo, hi, bins + 1)[1:-1] for lo, hi in zip(total.lo, total.hi)]
+        target = max(total.n // bins, 1)
+        hist   = _merge_hists(_run(_hist_pass, [(t, columns, edges) for t in tasks], workers))
+        for _ in range(SPEARMAN_REFINE):
+            finer = _refine(edges, hist, target)
+            if finer is None:
+                break
+            edges = finer
+            hist  = _merge_hists(_run(_hist_pass, [(t, columns, edges) for t in tasks], workers))
+        midranks = [np.cumsum(c) - c + (c + 1) / 2.0 for c, _, _ in hist]
+        ranks = _run(_rank_pass, [(t, columns, edges, midranks) for t in tasks], workers)
+        rho   = merge_all(ranks, p).corr()
+        # binned ranks = exact ranks projected onto the bins; with e = sqrt(lost share
+        # of rank variance), |rho - exact| <= ex + ey + ex*ey + |rho| * (1 - a)
+        e   = np.sqrt(_rank_error(hist, total.n))
+        a   = np.sqrt(np.outer(1 - e**2, 1 - e**2))
+        err = np.add.outer(e, e) + np.outer(e, e) + np.abs(rho) * (1 - a)
+        np.fill_diagonal(err, 0.0)
+        lo, hi = fisher_ci(rho, total.n, spearman=True)
+        stats["spearman"]     = rho.round(6).tolist()
+        stats["spearman_err"] = err.round(6).tolist()
+        stats["spearman_ci"]  = [np.clip(lo - err, -1, 1).round(6).tolist(),
+                                 np.clip(hi + err, -1, 1).round(6).tolist()]
+    return stats
+
+def _cache_path(version, columns, segments, bins, cache_dir):
+    key = hashlib.sha1(json.dumps([version, list(columns), list(segments), bins,
+                                   SPEARMAN_REFINE]).encode()).hexdigest()[:16]
+    return os.path.join(cache_dir, f"stats-{key}.json")
+
+def cached_stats(root=PARTITION_ROOT, columns=STAT_COLS, segments=SEGMENTS, workers=1,
+                 bins=STAT_BINS, cache_dir=STATS_DIR, refresh=False,
+                 master_root=CACHE_DIR, csv_path=MASTER_CSV):
+    """compute_stats() for the current master table, memoised on disk by its data
+    version. Reads the partition store in parallel when it mirrors that version,
+    else the needed columns from the column cache / CSV."""
+    version = current_version(master_root, csv_path)
+    path    = _cache_path(version, columns, segments, bins, cache_dir)
+    if not refresh and os.path.exists(path):
+        with open(path) as f:
+            return json.load(f)
+    source = None
+    if store_version(root) != version:
+        source = load_master(list(columns) + list(segments), master_root, csv_path)
+    stats = {"version": version, **compute_stats(source, columns, segments, True, workers, bins, root)}
+    os.makedirs(cache_dir, exist_ok=True)
+    tmp = path + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump(stats, f)
+    os.replace(tmp, path)
+    return stats
+
+def corr_frame(stats, kind="pearson", segment=None, value=None):
+    """A correlation matrix from `stats` as a labelled DataFrame
+    (kind: pearson / spearman / spearman_err / pearson_ci / spearman_ci -> (low, high) pair)."""
+    cols = stats["columns"]
+    if segment is not None:
+        return pd.DataFrame(stats["segments"][segment][value]["pearson"], index=cols, columns=cols)
+    m = stats[kind]
+    if kind.endswith("_ci"):
+        return tuple(pd.DataFrame(x, index=cols, columns=cols) for x in m)
+    return pd.DataFrame(m, index=cols, columns=cols)
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Fleet statistics for the master table")
+    ap.add_argument("--workers", type=int, default=1)
+    ap.add_argument("--refresh", action="store_true", help="recompute even if cached")
+    args = ap.parse_args()
+    stats = cached_stats(workers=args.workers, refresh=args.refresh)
+    pear, spear = corr_frame(stats), corr_frame(stats, "spearman")
+    err = corr_frame(stats, "spearman_err")
+    print(f"=== FLEET STATISTICS ({stats['n']:,} trips, version {stats['version']}) ===")
+    for c, s in stats["summary"].items():
+        print(f"  {c:<22} mean {s['mean']:>12.2f}  std {s['std']:>11.2f}  skew {s['skew']:>6.2f}")
+    print("\n=== STRONGEST CORRELATIONS (Pearson / Spearman) ===")
+    pairs = [(a, b) for i, a in enumerate(pear.columns) for b in pear.columns[i + 1:]]
+    for a, b in sorted(pairs, key=lambda ab: -abs(pear.loc[ab]))[:8]:
+        print(f"  {a:<22} {b:<22} r={pear.loc[a, b]:+.2f}  ρ={spear.loc[a, b]:+.2f} (±{err.loc[a, b]:.4f} binning)")
+    print(f"✅ Statistics cached in {STATS_DIR}/")
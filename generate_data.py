@@ -6,6 +6,8 @@ import pandas as pd
 import numpy as np
 import json
 import os
+from schemas import (VEHICLE_TYPES, FUEL_TYPES, ROUTES, ROUTE_CATEGORIES, TRAFFIC_LEVELS,
+                     WEATHER_CONDS, CUSTOMER_LOCATIONS, MAINT_TYPES)
 
 np.random.seed(42)
 os.makedirs("data", exist_ok=True)
@@ -17,8 +19,8 @@ N_DRIVERS = 25
 N_TRIPS = 500
 
 # ── 1. Vehicles ──────────────────────────────────────────────────────────────
-vehicle_types = ["Truck", "Van", "Sedan", "SUV", "Bus"]
-fuel_types    = ["Diesel", "Petrol", "CNG", "Electric"]
+vehicle_types = VEHICLE_TYPES
+fuel_types    = FUEL_TYPES
 vehicles = pd.DataFrame({
     "vehicle_id":   [f"V{i:03d}" for i in range(1, N_VEHICLES+1)],
     "vehicle_type": np.random.choice(vehicle_types, N_VEHICLES),
@@ -41,13 +43,10 @@ drivers = pd.DataFrame({
 drivers.to_csv("data/drivers.csv", index=False)
 
 # ── 3. GPS / Route logs ───────────────────────────────────────────────────────
-routes = ["Route_City_A", "Route_City_B", "Route_Highway_1",
-          "Route_Highway_2", "Route_Rural_X", "Route_Rural_Y", "Route_Mixed"]
-categories = {"Route_City_A":"City","Route_City_B":"City",
-               "Route_Highway_1":"Highway","Route_Highway_2":"Highway",
-               "Route_Rural_X":"Rural","Route_Rural_Y":"Rural","Route_Mixed":"Mixed"}
-traffic_levels = ["Low","Medium","High","Very High"]
-weather_conds  = ["Clear","Rain","Fog","Storm","Hot"]
+routes = ROUTES
+categories = ROUTE_CATEGORIES
+traffic_levels = TRAFFIC_LEVELS
+weather_conds  = WEATHER_CONDS
 
 route_logs = pd.DataFrame({
     "trip_id":        [f"T{i:04d}" for i in range(1, N_TRIPS+1)],
@@ -107,13 +106,13 @@ for _, row in route_logs.iterrows():
         "actual_duration_h":  round(expected_hrs + total_delay/60, 2),
         "delay_minutes":      total_delay,
         "delivery_status":    "On Time" if total_delay == 0 else ("Minor Delay" if total_delay < 30 else "Major Delay"),
-        "customer_location":  np.random.choice(["North Zone","South Zone","East Zone","West Zone","Central"]),
+        "customer_location":  np.random.choice(CUSTOMER_LOCATIONS),
     })
 delivery_df = pd.DataFrame(delivery_rows)
 delivery_df.to_json("data/delivery_timelines.json", orient="records", indent=2)
 
 # ── 6. Maintenance history ────────────────────────────────────────────────────
-maint_types = ["Oil Change","Tire Rotation","Brake Service","Engine Check","Full Service"]
+maint_types = MAINT_TYPES
 maint_rows = []
 for vid in vehicles["vehicle_id"]:
     n_maint = np.random.randint(1, 6)
@@ -0,0 +1,229 @@
+"""
+Transportation Analytics System
+Step 1b: GPS point streams (1 Hz per trip) and route-segment aggregation
+
+Usage:
+    python gps_stream.py generate [--trips N]   # data/gps/*.npy from data/route_logs.csv
+    python gps_stream.py segments               # derive trip metrics -> data/route_logs.csv
+
+segments overwrites distance_km / avg_speed_kmph with the GPS-derived values
+and keeps the original summary figures as distance_km_summary /
+avg_speed_kmph_summary, which generate reads when present, so re-running the
+two steps never feeds derived distances back into the simulator.
+
+Layout (data/gps/): one .npy column per field, memory-mapped on read
+    ts.npy     int64    epoch seconds
+    lat.npy    float64  degrees
+    lon.npy    float64  degrees
+    speed.npy  float32  km/h
+    offsets.npy int64   trip i owns points [offsets[i], offsets[i+1])
+    trips.csv           trip_id per offsets row
+"""
+import argparse
+import os
+import time
+import numpy as np
+import pandas as pd
+
+GPS_DIR        = "data/gps"
+POINT_COLS     = {"ts": np.int64, "lat": np.float64, "lon": np.float64, "speed": np.float32}
+CHUNK_POINTS   = 4_000_000      # points generated / aggregated per slice
+EARTH_R_M      = 6_371_000.0
+IDLE_KMPH      = 3.0            # below this the vehicle counts as idling
+HARSH_BRAKE_MS2 = 3.0           # deceleration threshold (~0.3 g)
+STOP_DECEL_MS2  = 1.2           # normal braking into / pulling away from a stop
+DEPOT_LAT, DEPOT_LON = 19.07, 72.88
+ROUTE_LOGS     = "data/route_logs.csv"
+SUMMARY_COLS   = ["distance_km", "avg_speed_kmph"]   # route_logs inputs the generator reads
+SUMMARY_SUFFIX = "_summary"     # original value kept beside the GPS-derived one
+
+# ── Generator ─────────────────────────────────────────────────────────────────
+def _trip_chunks(offsets, max_points=CHUNK_POINTS):
+    """Yield (first_trip, last_trip_exclusive) ranges holding ~max_points points."""
+    n, start = len(offsets) - 1, 0
+    while start < n:
+        stop = int(np.searchsorted(offsets, offsets[start] + max_points, side="right")) - 1
+        stop = min(max(stop, start + 1), n)
+        yield start, stop
+        start = stop
+
+def _simulate(trips, rng):
+    """Vectorized 1 Hz points for a slice of trips (distance_km, avg_speed_kmph, trip_date)."""
+    dist   = trips["distance_km"].to_numpy(float)
+    speed  = trips["avg_speed_kmph"].to_numpy(float)
+    n_pts  = np.maximum(np.round(dist / speed * 3600).astype(np.int64), 2)
+    starts = np.concatenate([[0], np.cumsum(n_pts)[:-1]])
+    trip   = np.repeat(np.arange(len(trips)), n_pts)
+    t      = np.arange(n_pts.sum()) - starts[trip]
+    total  = len(t)
+
+    # Cruise speed with slow oscillation + noise (smoothed over 5 s, so second-to-
+    # second jitter stays well below the harsh-braking threshold)
+    phase = rng.uniform(0, 2*np.pi, len(trips))
+    noise = np.convolve(rng.normal(0, 2, total), np.ones(5)/np.sqrt(5), mode="same")
+    v = speed[trip] * (1 + 0.15*np.sin(2*np.pi*t/900 + phase[trip])) + noise
+
+    # Stops (~1 per 30 min, 30-180 s). Speed is capped by the distance in time to
+    # the next stop and from the last one at a normal braking rate, so the vehicle
+    # slows down ahead of each stop and pulls away gradually after it.
+    stop_at  = np.flatnonzero(rng.random(total) < 1/1800)
+    stop_len = rng.integers(30, 180, len(stop_at))
+    stop_end = np.minimum(stop_at + stop_len, starts[trip[stop_at]] + n_pts[trip[stop_at]])
+    edges = np.zeros(total + 1); np.add.at(edges, stop_at, 1); np.add.at(edges, stop_end, -1)
+    idle  = np.cumsum(edges[:-1]) > 0
+    pos   = np.arange(total)
+    prev_idle = np.maximum.accumulate(np.where(idle, pos, -1))
+    next_idle = np.minimum.accumulate(np.where(idle, pos, total)[::-1])[::-1]
+    since = np.where((prev_idle >= 0) & (trip[np.maximum(prev_idle, 0)] == trip), pos - prev_idle, np.inf)
+    until = np.where((next_idle < total) & (trip[np.minimum(next_idle, total - 1)] == trip), next_idle - pos, np.inf)
+    v     = np.minimum(v, STOP_DECEL_MS2 * 3.6 * np.minimum(since, until))
+
+    # Harsh braking: instant 15-25 km/h drop recovering over 10 s (~1 per 20 min)
+    brake = np.where(rng.random(total) < 1/1200, rng.uniform(15, 25, total), 0.0)
+    v    -= np.convolve(brake, np.linspace(1, 0.1, 10))[:total]
+    v     = np.clip(v, 0, None)
+
+    # Rescale each trip so the integrated distance matches the logged distance
+    km = np.bincount(trip, weights=v, minlength=len(trips)) / 3600
+    v *= (dist / np.where(km > 0, km, 1))[trip]
+
+    # Positions: integrate speed along a slowly drifting heading
+    heading = rng.uniform(0, 2*np.pi, len(trips))[trip] + 0.3*np.sin(t/600 + phase[trip])
+    lat0 = DEPOT_LAT + rng.uniform(-0.5, 0.5, len(trips))
+    lon0 = DEPOT_LON + rng.uniform(-0.5, 0.5, len(trips))
+    step = v / 3.6
+    dlat = step*np.cos(heading) / 111_320
+    dlon = step*np.sin(heading) / (111_320*np.cos(np.radians(lat0[trip])))
+    c_lat, c_lon = np.cumsum(dlat), np.cumsum(dlon)
+    lat = lat0[trip] + c_lat - (c_lat - dlat)[starts][trip]
+    lon = lon0[trip] + c_lon - (c_lon - dlon)[starts][trip]
+
+    epoch = (pd.to_datetime(trips["trip_date"]).astype("int64") // 10**9).to_numpy()
+    return n_pts, {"ts": epoch[trip] + t, "lat": lat, "lon": lon, "speed": v}
+
+def _summary(route_logs, col):
+    """The route_logs summary figure for `col`, not a GPS-derived replacement."""
+    kept = col + SUMMARY_SUFFIX
+    return route_logs[kept if kept in route_logs.columns else col].to_numpy(float)
+
+def generate_stream(route_logs, root=GPS_DIR, seed=42):
+    """Write 1 Hz GPS columns for every trip in route_logs; returns total points."""
+    rng = np.random.default_rng(seed)
+    os.makedirs(root, exist_ok=True)
+    route_logs = route_logs.assign(distance_km=_summary(route_logs, "distance_km"),
+                                   avg_speed_kmph=_summary(route_logs, "avg_speed_kmph"))
+    dist   = route_logs["distance_km"].to_numpy(float)
+    speed  = route_logs["avg_speed_kmph"].to_numpy(float)
+    n_pts  = np.maximum(np.round(dist / speed * 3600).astype(np.int64), 2)
+    offsets = np.concatenate([[0], np.cumsum(n_pts)])
+    cols = {c: np.lib.format.open_memmap(os.path.join(root, f"{c}.npy"), mode="w+",
+                                         dtype=dt, shape=(int(offsets[-1]),))
+            for c, dt in POINT_COLS.items()}
+    for a, b in _trip_chunks(offsets):
+        _, pts = _simulate(route_logs.iloc[a:b], rng)
+        for c, arr in pts.items():
+            cols[c][offsets[a]:offsets[b]] = arr
+    for arr in cols.values():
+        arr.flush()
+    np.save(os.path.join(root, "offsets.npy"), offsets)
+    route_logs[["trip_id"]].to_csv(os.path.join(root, "trips.csv"), index=False)
+    return int(offsets[-1])
+
+def open_stream(root=GPS_DIR):
+    """Memory-mapped point columns, offsets and trip ids (no data is read yet)."""
+    cols = {c: np.load(os.path.join(root, f"{c}.npy"), mmap_mode="r") for c in POINT_COLS}
+    offsets = np.load(os.path.join(root, "offsets.npy"))
+    trip_ids = pd.read_csv(os.path.join(root, "trips.csv"))["trip_id"].to_numpy()
+    return cols, offsets, trip_ids
+
+# ── Segment engine ────────────────────────────────────────────────────────────
+def _haversine_m(lat1, lon1, lat2, lon2):
+    p1, p2 = np.radians(lat1), np.radians(lat2)
+    a = np.sin((p2 - p1)/2)**2 + np.cos(p1)*np.cos(p2)*np.sin(np.radians(lon2 - lon1)/2)**2
+    return 2*EARTH_R_M*np.arcsin(np.sqrt(a))
+
+def _segment_slice(cols, offsets, a, b):
+    lo, hi = offsets[a], offsets[b]
+    ts    = np.asarray(cols["ts"][lo:hi])
+    lat   = np.asarray(cols["lat"][lo:hi])
+    lon   = np.asarray(cols["lon"][lo:hi])
+    v     = np.asarray(cols["speed"][lo:hi], dtype=np.float64)
+    n_pts = np.diff(offsets[a:b+1])
+    trip  = np.repeat(np.arange(b - a), n_pts)
+
+    # Per-step quantities; the first point of each trip has no predecessor
+    first = np.zeros(hi - lo, dtype=bool); first[(offsets[a:b] - lo)[n_pts > 0]] = True
+    dt    = np.diff(ts, prepend=ts[:1]).astype(np.float64)
+    step  = np.concatenate([[0.0], _haversine_m(lat[:-1], lon[:-1], lat[1:], lon[1:])])
+    dv    = np.concatenate([[0.0], np.diff(v)]) / 3.6
+    dt[first] = 0; step[first] = 0; dv[first] = 0
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        decel = np.where(dt > 0, -dv / dt, 0.0)
+    harsh   = decel > HARSH_BRAKE_MS2
+    onset   = harsh & ~np.concatenate([[False], harsh[:-1]])   # count events, not seconds
+    idle_dt = np.where(v < IDLE_KMPH, dt, 0.0)
+
+    n = b - a
+    dist_km = np.bincount(trip, weights=step, minlength=n) / 1000
+    dur_h   = np.bincount(trip, weights=dt, minlength=n) / 3600
+    with np.errstate(divide="ignore", invalid="ignore"):
+        avg_speed = np.where(dur_h > 0, dist_km / dur_h, 0.0)
+    return pd.DataFrame({
+        "distance_km":       np.round(dist_km, 1),
+        "avg_speed_kmph":    np.round(avg_speed, 1),
+        "idle_time_min":     np.round(np.bincount(trip, weights=idle_dt, minlength=n) / 60, 1),
+        "harsh_brake_count": np.bincount(trip, weights=onset, minlength=n).astype(int),
+    })
+
+def segment_metrics(root=GPS_DIR, max_points=CHUNK_POINTS):
+    """Per-trip distance_km, avg_speed_kmph, idle_time_min and harsh_brake_count,
+    aggregated slice by slice straight from the memory-mapped stream."""
+    cols, offsets, trip_ids = open_stream(root)
+    parts = [_segment_slice(cols, offsets, a, b) for a, b in _trip_chunks(offsets, max_points)]
+    out = pd.concat(parts, ignore_index=True)
+    out.insert(0, "trip_id", trip_ids)
+    return out
+
+def apply_to_route_logs(route_logs, metrics):
+    """Replace the summary route_logs fields with GPS-derived values where
+    available; the first replacement of a SUMMARY_COLS field keeps the original
+    as <col>_summary."""
+    gps = metrics.set_index("trip_id")
+    out = route_logs.copy()
+    hit = out["trip_id"].isin(gps.index)
+    for col in gps.columns:
+        kept = col + SUMMARY_SUFFIX
+        if col in SUMMARY_COLS and col in out.columns and kept not in out.columns:
+            out[kept] = out[col]
+        vals = gps.loc[out.loc[hit, "trip_id"], col].to_numpy()
+        if hit.all():
+            out[col] = vals
+            continue
+        if col not in out.columns:
+            out[col] = np.nan
+        out.loc[hit, col] = vals
+    return out
+
+if __name__ == "__main__":
+    ap  = argparse.ArgumentParser(description="1 Hz GPS stream generator and segment engine")
+    sub = ap.add_subparsers(dest="cmd")
+    gen = sub.add_parser("generate", help="simulate data/gps/ from route_logs")
+    gen.add_argument("--trips", type=int, default=None, help="only the first N trips")
+    sub.add_parser("segments", help="derive trip metrics and merge them into route_logs")
+    args = ap.parse_args()
+
+    route_logs = pd.read_csv(ROUTE_LOGS, parse_dates=["trip_date"])
+    if args.cmd in (None, "generate"):
+        if getattr(args, "trips", None):
+            route_logs = route_logs.head(args.trips)
+        n = generate_stream(route_logs)
+        print(f"✅ GPS stream written: {GPS_DIR}/ ({n:,} points, {len(route_logs)} trips)")
+    else:
+        t0 = time.perf_counter()
+        metrics = segment_metrics()
+        n_pts = int(np.load(os.path.join(GPS_DIR, "offsets.npy"))[-1])
+        elapsed = time.perf_counter() - t0
+        apply_to_route_logs(route_logs, metrics).to_csv(ROUTE_LOGS, index=False)
+        print(f"✅ Segment metrics for {len(metrics)} trips merged into {ROUTE_LOGS}")
+        print(f"   {n_pts:,} points in {elapsed:.2f}s ({n_pts/elapsed/1e6:.1f}M points/s)")
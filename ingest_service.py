@@ -0,0 +1,239 @@
+"""
+Transportation Analytics System
+Live ingest: asyncio HTTP endpoint for trip, fuel and delivery events
+
+Usage:
+    python ingest_service.py [--host 127.0.0.1] [--port 8765]
+
+Endpoints (JSON):
+    POST /events/trip | /events/fuel | /events/delivery   one record or a list
+    GET  /kpis                                            live executive KPIs
+    GET  /health
+
+Accepted records are validated against schemas.SCHEMAS, buffered and
+appended in micro-batches to data/live/<source>.csv (picked up by
+etl_pipeline.py). Once a trip has all three events it is folded into the
+running KPI sums, so /kpis stays current without an ETL rerun.
+
+Like the ETL, the first record per (source, trip_id) wins: events for trips
+already in the master table and repeats of an accepted event are rejected as
+duplicates. On start-up the live records the ETL has not absorbed yet are
+replayed into the KPI sums.
+"""
+import argparse
+import asyncio
+import json
+import os
+import time
+import urllib.error
+import urllib.request
+from http import HTTPStatus
+import pandas as pd
+
+from column_cache import load_master
+from kpi_metrics import KpiAccumulator
+from schemas import SCHEMAS, ROUTE_CATEGORIES, validate_record
+
+LIVE_DIR       = "data/live"
+BATCH_SIZE     = 500     # flush once this many records are buffered ...
+FLUSH_INTERVAL = 1.0     # ... or after this many seconds
+MAX_BODY       = 8 * 1024 * 1024
+
+# Expected-value cost model for live trips (midpoints of the ETL's rate ranges)
+TOLL_RATE_INR_KM   = 2.75    # Highway / Mixed only
+LABOUR_RATE_INR_H  = 225.0
+
+def estimate_cost_per_km(trip, fuel, delivery, maint_per_trip):
+    toll   = trip["distance_km"] * TOLL_RATE_INR_KM if trip["route_category"] in ("Highway", "Mixed") else 0.0
+    labour = delivery["actual_duration_h"] * LABOUR_RATE_INR_H
+    return (fuel["fuel_cost_inr"] + toll + labour + maint_per_trip) / trip["distance_km"]
+
+class IngestService:
+    def __init__(self, live_dir=LIVE_DIR, batch_size=BATCH_SIZE,
+                 flush_interval=FLUSH_INTERVAL, master=None):
+        self.live_dir       = live_dir
+        self.batch_size     = batch_size
+        self.flush_interval = flush_interval
+        self.buffers        = {src: [] for src in SCHEMAS}
+        self.pending        = {}     # trip_id -> {source: record} until all three arrive
+        self.counts         = {"accepted": 0, "rejected": 0, "written": 0}
+        self.acc            = KpiAccumulator()
+        self.maint_per_trip = 0.0
+        self.master_ids     = pd.Index([])
+        self.seen           = set()  # (source, trip_id) accepted since the last ETL
+        self._last_flush    = time.monotonic()
+        self._lock          = asyncio.Lock()
+        self._write_lock    = asyncio.Lock()   # one flush appends to data/live at a time
+        if master is not None and len(master):
+            self.acc = KpiAccumulator.from_master(master)
+            self.master_ids = pd.Index(master["trip_id"])
+            self.maint_per_trip = float((master["total_trip_cost_inr"] - master["fuel_cost_inr"]
+                                         - master["toll_cost_inr"] - master["labour_cost_inr"]).mean())
+        os.makedirs(live_dir, exist_ok=True)
+        self._replay()
+
+    def _replay(self):
+        """Fold live records written before a restart (and not yet in the master) back in."""
+        for source in SCHEMAS:
+            path = os.path.join(self.live_dir, f"{source}.csv")
+            if not os.path.exists(path):
+                continue
+            live = pd.read_csv(path)
+            live = live[~live["trip_id"].isin(self.master_ids)].astype(object)
+            for rec in live.where(live.notna(), None).to_dict("records"):
+                if (source, rec["trip_id"]) not in self.seen:
+                    self.seen.add((source, rec["trip_id"]))
+                    self._track(source, rec)
+
+    # ── Events ────────────────────────────────────────────────────────────────
+    async def submit(self, source, records):
+        """Validate and buffer records; returns (accepted, [(i, errors), ...])."""
+        if not isinstance(records, list):
+            records = [records]
+        accepted, rejected = 0, []
+        async with self._lock:
+            for i, rec in enumerate(records):
+                clean, errors = validate_record(source, rec)
+                if errors:
+                    rejected.append((i, errors))
+                    continue
+                if clean["trip_id"] in self.master_ids or (source, clean["trip_id"]) in self.seen:
+                    rejected.append((i, [f"trip_id: duplicate {source} event for {clean['trip_id']!r}"]))
+                    continue
+                if source == "trip" and not clean["route_category"]:
+                    clean["route_category"] = ROUTE_CATEGORIES[clean["route_name"]]
+                self.seen.add((source, clean["trip_id"]))
+                self.buffers[source].append(clean)
+                self._track(source, clean)
+                accepted += 1
+            self.counts["accepted"] += accepted
+            self.counts["rejected"] += len(rejected)
+            full = sum(map(len, self.buffers.values())) >= self.batch_size
+        if full:
+            await self.flush()
+        return accepted, rejected
+
+    def _track(self, source, rec):
+        parts = self.pending.setdefault(rec["trip_id"], {})
+        parts[source] = rec
+        if len(parts) < len(SCHEMAS):
+            return
+        trip, fuel, delivery = parts["trip"], parts["fuel"], parts["delivery"]
+        self.acc.add(distance_km=trip["distance_km"],
+                     fuel_efficiency_kml=trip["distance_km"] / fuel["fuel_consumed_l"],
+                     delivery_status=delivery["delivery_status"],
+                     delay_minutes=delivery["delay_minutes"],
+                     cost_per_km=estimate_cost_per_km(trip, fuel, delivery, self.maint_per_trip))
+        del self.pending[rec["trip_id"]]
+
+    # ── Micro-batched writes ──────────────────────────────────────────────────
+    async def flush(self):
+        async with self._write_lock:
+            async with self._lock:
+                batches = {src: buf for src, buf in self.buffers.items() if buf}
+                self.buffers = {src: [] for src in SCHEMAS}
+                self._last_flush = time.monotonic()
+            if batches:
+                await asyncio.to_thread(self._write, batches)
+
+    def _write(self, batches):
+        for src, rows in batches.items():
+            path = os.path.join(self.live_dir, f"{src}.csv")
+            pd.DataFrame(rows, columns=list(SCHEMAS[src])).to_csv(
+                path, mode="a", index=False, header=not os.path.exists(path))
+            self.counts["written"] += len(rows)
+
+    async def _flusher(self):
+        while True:
+            await asyncio.sleep(self.flush_interval / 4)
+            if time.monotonic() - self._last_flush >= self.flush_interval:
+                await self.flush()
+
+    # ── HTTP ──────────────────────────────────────────────────────────────────
+    async def _route(self, method, path, body):
+        if method == "GET" and path == "/kpis":
+            return 200, {**self.acc.kpis(), "pending_trips": len(self.pending)}
+        if method == "GET" and path == "/health":
+            return 200, {"status": "ok", **self.counts}
+        if method == "POST" and path.startswith("/events/"):
+            source = path[len("/events/"):]
+            if source not in SCHEMAS:
+                return 404, {"error": f"unknown source {source!r}"}
+            try:
+                records = json.loads(body or b"null")
+            except json.JSONDecodeError as e:
+                return 400, {"error": f"invalid JSON: {e}"}
+            accepted, rejected = await self.submit(source, records)
+            status = 200 if not rejected else (207 if accepted else 422)
+            return status, {"accepted": accepted,
+                            "rejected": [{"index": i, "errors": e} for i, e in rejected]}
+        return 404, {"error": "not found"}
+
+    async def handle(self, reader, writer):
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                method, path, _ = line.decode("latin-1").split(" ", 2)
+                headers = {}
+                while (h := await reader.readline()) not in (b"\r\n", b"\n", b""):
+                    k, _, v = h.decode("latin-1").partition(":")
+                    headers[k.strip().lower()] = v.strip()
+                length = int(headers.get("content-length", 0))
+                if length > MAX_BODY:
+                    status, payload = 413, {"error": "body too large"}
+                else:
+                    body = await reader.readexactly(length) if length else b""
+                    try:
+                        status, payload = await self._route(method, path.split("?")[0], body)
+                    except Exception as e:   # answer instead of dropping the connection
+                        status, payload = 500, {"error": f"{type(e).__name__}: {e}"}
+                data = json.dumps(payload, default=str).encode()
+                writer.write(f"HTTP/1.1 {status} {HTTPStatus(status).phrase}\r\nContent-Type: application/json\r\n"
+                             f"Content-Length: {len(data)}\r\n\r\n".encode() + data)
+                await writer.drain()
+                if length > MAX_BODY or headers.get("connection", "").lower() == "close":
+                    break
+        except (ValueError, asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    async def serve(self, host="127.0.0.1", port=8765):
+        server  = await asyncio.start_server(self.handle, host, port)
+        flusher = asyncio.create_task(self._flusher())
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            flusher.cancel()
+            await self.flush()
+
+# ── Local client (tests / scripts) ────────────────────────────────────────────
+def post_events(source, records, host="127.0.0.1", port=8765):
+    req = urllib.request.Request(f"http://{host}:{port}/events/{source}",
+                                 data=json.dumps(records, default=str).encode(),
+                                 headers={"Content-Type": "application/json"}, method="POST")
+    try:
+        with urllib.request.urlopen(req) as resp:
+            return json.load(resp)
+    except urllib.error.HTTPError as e:
+        return json.load(e)
+
+def get_kpis(host="127.0.0.1", port=8765):
+    with urllib.request.urlopen(f"http://{host}:{port}/kpis") as resp:
+        return json.load(resp)
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Live ingest service")
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=8765)
+    args = ap.parse_args()
+    master = load_master() if os.path.exists("data/master_analytics_table.csv") else None
+    service = IngestService(master=master)
+    print(f"✅ Ingest service listening on http://{args.host}:{args.port}  (live store: {LIVE_DIR}/)")
+    try:
+        asyncio.run(service.serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
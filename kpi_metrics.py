@@ -0,0 +1,93 @@
+"""
+Transportation Analytics System
+Executive dashboard KPIs, monthly summary and route / vehicle rollups
+"""
+
+KPI_LABELS = {
+    "total_trips":       "Total Trips",
+    "total_distance_km": "Total Distance",
+    "avg_fuel_eff_kml":  "Avg Fuel Eff.",
+    "on_time_rate_pct":  "On-Time Rate",
+    "avg_delay_min":     "Avg Delay",
+    "avg_cost_per_km":   "Avg Cost/km",
+}
+
+def executive_kpis(master):
+    """The six Executive Summary KPIs as plain floats."""
+    return KpiAccumulator.from_master(master).kpis()
+
+class KpiAccumulator:
+    """Running sums behind the executive KPIs; trips can be added one at a time
+    and accumulators from different sources merged."""
+    FIELDS = ("trips", "distance", "eff", "on_time", "delay", "cost_km")
+
+    def __init__(self, **sums):
+        self.sums = {f: float(sums.get(f, 0.0)) for f in self.FIELDS}
+
+    @classmethod
+    def from_master(cls, master):
+        return cls(trips=len(master),
+                   distance=master["distance_km"].sum(),
+                   eff=master["fuel_efficiency_kml"].sum(),
+                   on_time=(master["delivery_status"] == "On Time").sum(),
+                   delay=master["delay_minutes"].sum(),
+                   cost_km=master["cost_per_km"].sum())
+
+    def add(self, distance_km, fuel_efficiency_kml, delivery_status, delay_minutes, cost_per_km):
+        s = self.sums
+        s["trips"]    += 1
+        s["distance"] += distance_km
+        s["eff"]      += fuel_efficiency_kml
+        s["on_time"]  += delivery_status == "On Time"
+        s["delay"]    += delay_minutes
+        s["cost_km"]  += cost_per_km
+
+    def merge(self, other):
+        for f in self.FIELDS:
+            self.sums[f] += other.sums[f]
+        return self
+
+    def kpis(self):
+        s, n = self.sums, self.sums["trips"]
+        mean = lambda f, scale=1: s[f] / n * scale if n else None
+        return {
+            "total_trips":       int(n),
+            "total_distance_km": s["distance"],
+            "avg_fuel_eff_kml":  mean("eff"),
+            "on_time_rate_pct":  mean("on_time", 100),
+            "avg_delay_min":     mean("delay"),
+            "avg_cost_per_km":   mean("cost_km"),
+        }
+
+# ── Tables shared by excel_report.py and kpi_server.py ───────────────────────
+def monthly_summary(master):
+    """Monthly Performance Summary rows (Executive Summary sheet)."""
+    return master.assign(on_time=(master["delivery_status"] == "On Time") * 100.0) \
+        .groupby("trip_month", observed=True).agg(
+            trips=("trip_id","count"), dist=("distance_km","sum"),
+            fuel=("fuel_consumed_l","sum"), eff=("fuel_efficiency_kml","mean"),
+            delay=("delay_minutes","mean"), cost=("total_trip_cost_inr","sum"),
+            ontime=("on_time","mean"),
+        ).reset_index()
+
+def route_rollup(master):
+    """Per-route cost, efficiency and delay rollup, most expensive first."""
+    return master.assign(major=master["delivery_status"] == "Major Delay") \
+        .groupby(["route_name","route_category"], observed=True).agg(
+            trips=("trip_id","count"), avg_dist=("distance_km","mean"),
+            avg_fuel_eff=("fuel_efficiency_kml","mean"), avg_delay=("delay_minutes","mean"),
+            avg_cost_km=("cost_per_km","mean"), total_cost=("total_trip_cost_inr","sum"),
+            major_delays=("major","sum"),
+            avg_difficulty=("road_difficulty","mean"),
+        ).reset_index().sort_values("avg_cost_km",ascending=False)
+
+def vehicle_rollup(master):
+    """Per-vehicle attributes plus trip rollups, most efficient first."""
+    return master.drop_duplicates("vehicle_id").merge(
+        master.groupby("vehicle_id", observed=True).agg(
+            trips=("trip_id","count"), avg_eff=("fuel_efficiency_kml","mean"),
+            avg_delay=("delay_minutes","mean"), avg_cost_km=("cost_per_km","mean"),
+            total_km=("distance_km","sum"), total_fuel=("fuel_consumed_l","sum"),
+        ).reset_index(), on="vehicle_id"
+    )[["vehicle_id","vehicle_type","fuel_type","year_mfg","base_km_per_l",
+       "total_maint_cost_inr","trips","avg_eff","avg_delay","avg_cost_km","total_km","total_fuel"]].sort_values("avg_eff",ascending=False)
@@ -0,0 +1,210 @@
+"""
+Transportation Analytics System
+Read-only KPI API for the executive dashboard
+
+Usage:
+    python kpi_server.py [--host 127.0.0.1] [--port 8766] [--ttl 30]
+
+Endpoints (GET, JSON):
+    /kpis                 six Executive Summary KPIs
+    /monthly              Monthly Performance Summary
+    /rollups/route        per-route rollup
+    /rollups/driver       per-driver scores (driver_scoring.py)
+    /rollups/vehicle      per-vehicle rollup
+    /version, /health
+
+Filters (any endpoint): start, end (YYYY-MM-DD, inclusive), vehicle_id,
+driver_id, route_category (comma-separated lists). Bad filters get a 400,
+unknown paths a 404 and handler failures a 500, always with a JSON error.
+
+The master table is loaded once from the column cache. Responses are kept
+in an LRU/TTL cache keyed by (data version, endpoint, filters); when the
+ETL publishes a new data version the table is reloaded and the cache starts
+fresh.
+"""
+import argparse
+import json
+import math
+import threading
+import time
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, parse_qs
+import pandas as pd
+
+from column_cache import load_master, current_version, CACHE_DIR, MASTER_CSV
+from driver_scoring import driver_scores
+from kpi_metrics import executive_kpis, monthly_summary, route_rollup, vehicle_rollup
+from master_store import filter_scope
+
+CACHE_SIZE       = 1024
+CACHE_TTL        = 30.0   # seconds
+VERSION_CHECK_S  = 2.0    # how often the data version is re-checked
+FILTER_KEYS      = {"vehicle_id": "vehicle_ids", "driver_id": "driver_ids",
+                    "route_category": "route_categories"}
+
+ENDPOINTS = {
+    "/kpis":            executive_kpis,
+    "/monthly":         monthly_summary,
+    "/rollups/route":   route_rollup,
+    "/rollups/driver":  lambda m: driver_scores(m)["table"].sort_values("rank"),
+    "/rollups/vehicle": vehicle_rollup,
+}
+
+class TTLCache:
+    """Thread-safe LRU cache whose entries also expire after `ttl` seconds."""
+    def __init__(self, maxsize=CACHE_SIZE, ttl=CACHE_TTL):
+        self.maxsize, self.ttl = maxsize, ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = self.misses = 0
+
+    def get(self, key):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None or time.monotonic() - item[0] > self.ttl:
+                self._data.pop(key, None)
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return item[1]
+
+    def put(self, key, value):
+        with self._lock:
+            self._data[key] = (time.monotonic(), value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+def _jsonable(result):
+    if hasattr(result, "to_dict"):
+        result = result.to_dict(orient="records")
+    if isinstance(result, list):
+        return [_jsonable(r) for r in result]
+    if isinstance(result, dict):
+        return {k: _jsonable(v) for k, v in result.items()}
+    if hasattr(result, "item"):          # numpy scalars
+        result = result.item()
+    if isinstance(result, float) and math.isnan(result):
+        return None
+    return result
+
+class KpiStore:
+    """Master table + data version, reloaded when the ETL publishes a new cache."""
+    def __init__(self, cache_dir=CACHE_DIR, csv_path=MASTER_CSV, ttl=CACHE_TTL):
+        self.cache_dir, self.csv_path = cache_dir, csv_path
+        self.responses = TTLCache(ttl=ttl)
+        self._lock     = threading.Lock()
+        self._checked  = 0.0
+        self.version   = None
+        self.master    = None
+        self.refresh(force=True)
+
+    def refresh(self, force=False):
+        now = time.monotonic()
+        if not force and now - self._checked < VERSION_CHECK_S:
+            return
+        with self._lock:
+            self._checked = now
+            version = current_version(self.cache_dir, self.csv_path)
+            if version != self.version:
+                self.master  = load_master(root=self.cache_dir, csv_path=self.csv_path)
+                self.version = version
+                self.responses.clear()
+
+    def snapshot(self):
+        """(version, master) as one consistent pair, even while refresh() swaps them."""
+        with self._lock:
+            return self.version, self.master
+
+    def query(self, path, params):
+        self.refresh()
+        version, master = self.snapshot()
+        key = (version, path, tuple(sorted(params.items())))
+        cached = self.responses.get(key)
+        if cached is not None:
+            return cached
+        scope = {"start": params.get("start"), "end": params.get("end")}
+        for qk, sk in FILTER_KEYS.items():
+            if params.get(qk):
+                scope[sk] = params[qk].split(",")
+        data = filter_scope(master, scope) if any(scope.values()) else master
+        body = json.dumps({"version": version, "filters": params,
+                           "data": _jsonable(ENDPOINTS[path](data))}, default=str).encode()
+        self.responses.put(key, body)
+        return body
+
+def parse_params(query):
+    """Filter parameters from a query string, validated up front.
+    Returns (params, error); dates are normalised to YYYY-MM-DD."""
+    raw = {k: v[-1] for k, v in parse_qs(query).items()}
+    unknown = sorted(set(raw) - {"start", "end", *FILTER_KEYS})
+    if unknown:
+        return None, f"unknown parameters: {unknown}"
+    params = {k: v for k, v in raw.items() if k in FILTER_KEYS and v.strip(",")}
+    for k in ("start", "end"):
+        if raw.get(k):
+            try:
+                params[k] = pd.Timestamp(raw[k]).strftime("%Y-%m-%d")
+            except (ValueError, TypeError, OverflowError):
+                return None, f"{k}: {raw[k]!r} is not a date (expected YYYY-MM-DD)"
+    if params.get("start") and params.get("end") and params["start"] > params["end"]:
+        return None, "start is after end"
+    return params, None
+
+def make_handler(store):
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            try:
+                status, body = self._dispatch()
+            except Exception as e:       # answer instead of dropping the connection
+                status, body = 500, json.dumps({"error": f"{type(e).__name__}: {e}"}).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _dispatch(self):
+            url = urlsplit(self.path)
+            params, error = parse_params(url.query)
+            if url.path in ENDPOINTS and error:
+                status, body = 400, json.dumps({"error": error}).encode()
+            elif url.path in ENDPOINTS:
+                status, body = 200, store.query(url.path, params)
+            elif url.path == "/version":
+                store.refresh()
+                status, body = 200, json.dumps({"version": store.version}).encode()
+            elif url.path == "/health":
+                c = store.responses
+                status, body = 200, json.dumps({"status": "ok", "version": store.version,
+                                                "cache_hits": c.hits, "cache_misses": c.misses}).encode()
+            else:
+                status, body = 404, json.dumps({"error": "not found",
+                                                "endpoints": sorted(ENDPOINTS)}).encode()
+            return status, body
+
+        def log_message(self, *args):   # keep high-rate polling quiet
+            pass
+    return Handler
+
+def make_server(host="127.0.0.1", port=8766, ttl=CACHE_TTL, **store_kw):
+    return ThreadingHTTPServer((host, port), make_handler(KpiStore(ttl=ttl, **store_kw)))
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Read-only KPI API server")
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=8766)
+    ap.add_argument("--ttl", type=float, default=CACHE_TTL, help="response cache TTL (s)")
+    args = ap.parse_args()
+    server = make_server(args.host, args.port, args.ttl)
+    print(f"✅ KPI API on http://{args.host}:{args.port}  (endpoints: {', '.join(sorted(ENDPOINTS))})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.server_close()
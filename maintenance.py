@@ -0,0 +1,224 @@
+"""
+Transportation Analytics System
+Maintenance index: usage-based cost attribution and next-service forecast
+
+Usage:
+    python maintenance.py [--asof 2024-01-01]
+
+Trips and service events are keyed by (vehicle, day) packed into one sorted
+int64, so every per-vehicle lookup is an as-of join done with np.searchsorted:
+
+  * odometer      cumulative trip km per vehicle, read at each service event
+  * attribution   each service's cost is spread over the trips driven since the
+                  vehicle's previous service (trips up to and including the
+                  service day), pro rata by distance. Services with no trips
+                  since the vehicle's last driven-to service are added to that
+                  interval, so "service" rows sum to actual spend. Trips after
+                  the last service accrue at the vehicle's historical cost per
+                  km (fleet rate if it has none) and are marked "estimate";
+                  the next recorded service replaces those figures
+  * forecast      next service date per vehicle from its average service
+                  interval in days and in km, whichever comes first
+"""
+import argparse
+import os
+import numpy as np
+import pandas as pd
+
+FORECAST_PATH = "data/maintenance_forecast.csv"
+RATE_DAYS     = 90      # trailing window for a vehicle's daily km rate
+
+# ── Usage index ───────────────────────────────────────────────────────────────
+def _key(codes, dates, origin):
+    days = ((pd.to_datetime(dates) - origin) // pd.Timedelta(days=1)).to_numpy(np.int64)
+    return (codes.astype(np.int64) << 32) | days
+
+def usage_index(trips, maint):
+    """Time-ordered trip and service-event arrays sharing one vehicle coding.
+
+    Returns a dict with vehicle ids, per-trip sorted keys / km / cumulative km
+    (trip_order maps back to `trips` rows) and the sorted service events."""
+    vids, uniq = pd.factorize(pd.concat([trips["vehicle_id"], maint["vehicle_id"]], ignore_index=True), sort=True)
+    t_codes, m_codes = vids[:len(trips)], vids[len(trips):]
+    origin = min(pd.to_datetime(trips["trip_date"]).min(), pd.to_datetime(maint["maint_date"]).min())
+
+    t_key   = _key(t_codes, trips["trip_date"], origin)
+    t_order = np.argsort(t_key, kind="stable")
+    t_km    = trips["distance_km"].to_numpy(float)[t_order]
+    t_csum  = np.concatenate([[0.0], np.cumsum(t_km)])
+
+    m_key   = _key(m_codes, maint["maint_date"], origin)
+    m_order = np.argsort(m_key, kind="stable")
+    return {"vehicle_ids": np.asarray(uniq, dtype=object), "origin": origin,
+            "trip_key": t_key[t_order], "trip_order": t_order, "trip_km": t_km, "trip_csum": t_csum,
+            "trip_vehicle": t_codes[t_order],
+            "maint_key": m_key[m_order], "maint_vehicle": m_codes[m_order],
+            "maint": maint.iloc[m_order].reset_index(drop=True)}
+
+def _vehicle_start(idx):
+    """Position of each vehicle's first trip in the sorted trip arrays."""
+    return np.searchsorted(idx["trip_key"], np.arange(len(idx["vehicle_ids"]), dtype=np.int64) << 32)
+
+def maint_events(trips, maint, idx=None):
+    """Service events in (vehicle, date) order with odometer and usage since the previous one."""
+    idx   = idx or usage_index(trips, maint)
+    ev    = idx["maint"].copy()
+    pos   = np.searchsorted(idx["trip_key"], idx["maint_key"], side="right")
+    start = _vehicle_start(idx)[idx["maint_vehicle"]]
+    ev["odometer_km"] = idx["trip_csum"][pos] - idx["trip_csum"][start]
+    first = np.r_[True, idx["maint_vehicle"][1:] != idx["maint_vehicle"][:-1]]
+    ev["km_since_prev"]   = np.where(first, ev["odometer_km"], ev["odometer_km"].diff())
+    days = pd.to_datetime(ev["maint_date"]).diff().dt.days
+    ev["days_since_prev"] = np.where(first, np.nan, days)
+    return ev
+
+# ── Cost attribution ──────────────────────────────────────────────────────────
+def attribute_maint_cost(trips, maint):
+    """Maintenance cost per trip (aligned with `trips`) and its basis: "service"
+    for cost attributed from recorded services (these sum to the recorded
+    spend of every vehicle that has trips), "estimate" for trips after the
+    vehicle's last service, accrued at its historical cost per km."""
+    idx   = usage_index(trips, maint)
+    n, V  = len(trips), len(idx["vehicle_ids"])
+    m_key, m_veh = idx["maint_key"], idx["maint_vehicle"]
+    cost  = idx["maint"]["maint_cost_inr"].to_numpy(float)
+
+    # As-of join: the first service on/after each trip, for the same vehicle
+    nxt   = np.searchsorted(m_key, idx["trip_key"], side="left")
+    has   = nxt < len(m_key)
+    has[has] = m_veh[nxt[has]] == idx["trip_vehicle"][has]
+
+    # Services with no trips since the previous one roll their cost forward
+    km_ev = np.bincount(nxt[has], weights=idx["trip_km"][has], minlength=len(m_key))
+    used  = km_ev > 0
+    ccum  = np.concatenate([[0.0], np.cumsum(cost)])
+    last_used = np.maximum.accumulate(np.where(used, np.arange(len(m_key)), -1))
+    prev_used = np.r_[-1, last_used[:-1]]
+    veh_first = np.searchsorted(m_key, m_veh.astype(np.int64) << 32)
+    base  = np.maximum(prev_used + 1, veh_first)
+    eff_cost = np.where(used, ccum[np.arange(len(m_key)) + 1] - ccum[base], 0.0)
+
+    # Trailing spend: services after each vehicle's last service that had trips
+    last_driven = np.full(V, -1)
+    np.maximum.at(last_driven, m_veh[used], np.flatnonzero(used))
+    trailing  = np.arange(len(m_key)) > last_driven[m_veh]
+    tail_cost = np.bincount(m_veh[trailing], weights=cost[trailing], minlength=V)
+
+    # Historical rate per vehicle (fleet rate for vehicles with no driven interval)
+    veh_cost = np.bincount(m_veh, weights=eff_cost, minlength=V)
+    veh_km   = np.bincount(m_veh, weights=km_ev, minlength=V)
+    fleet    = veh_cost.sum() / veh_km.sum() if veh_km.sum() else 0.0
+    with np.errstate(divide="ignore", invalid="ignore"):
+        veh_rate = np.where(veh_km > 0, veh_cost / veh_km, fleet)
+
+    # Trailing spend lands on the vehicle's last driven interval; a vehicle with
+    # spend but no driven interval spreads it over its trips after the last service
+    rest_to = last_driven >= 0
+    eff_cost[last_driven[rest_to]] += tail_cost[rest_to]
+    spread  = ~rest_to & (tail_cost > 0)
+    open_km = np.bincount(idx["trip_vehicle"][~has], weights=idx["trip_km"][~has], minlength=V)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        rate_ev   = np.where(used, eff_cost / km_ev, 0.0)
+        open_rate = np.where(spread, tail_cost / open_km, veh_rate)
+    estimate = ~has & ~spread[idx["trip_vehicle"]]
+
+    alloc = np.zeros(len(idx["trip_km"]))
+    alloc[has]  = idx["trip_km"][has] * rate_ev[nxt[has]]
+    alloc[~has] = idx["trip_km"][~has] * open_rate[idx["trip_vehicle"][~has]]
+
+    out = np.empty(n)
+    basis = np.empty(n, dtype=object)
+    out[idx["trip_order"]]   = alloc
+    basis[idx["trip_order"]] = np.where(estimate, "estimate", "service")
+    return pd.DataFrame({"trip_id": trips["trip_id"].to_numpy(),
+                         "maint_alloc_inr": np.round(out, 2), "maint_basis": basis}, index=trips.index)
+
+# ── Next-service forecast ─────────────────────────────────────────────────────
+def forecast_next_service(trips, maint, asof=None):
+    """Next service date for every vehicle, in one pass over the index.
+
+    Due date = the earlier of last service + mean interval (days) and the day
+    the mean km interval is reached at the vehicle's trailing daily km rate.
+    Vehicles with fewer than two services use the fleet medians."""
+    asof   = pd.Timestamp(asof) if asof is not None else pd.to_datetime(trips["trip_date"]).max()
+    maint  = maint[pd.to_datetime(maint["maint_date"]) <= asof]    # no services from the future
+    idx    = usage_index(trips, maint)
+    ev     = maint_events(trips, maint, idx)
+    V      = len(idx["vehicle_ids"])
+    origin = idx["origin"]
+    asof_d = (asof - origin).days
+    veh    = idx["maint_vehicle"]
+
+    services = np.bincount(veh, minlength=V)
+    gaps     = ~np.isnan(ev["days_since_prev"].to_numpy())
+    gap_n    = np.bincount(veh[gaps], minlength=V)
+    days_sum = np.bincount(veh[gaps], weights=ev["days_since_prev"].to_numpy()[gaps], minlength=V)
+    km_sum   = np.bincount(veh[gaps], weights=ev["km_since_prev"].to_numpy()[gaps], minlength=V)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        int_days = days_sum / gap_n
+        int_km   = km_sum / gap_n
+    med_days = np.nanmedian(ev["days_since_prev"]) if gaps.any() else 180.0
+    med_km   = np.nanmedian(ev["km_since_prev"][gaps]) if gaps.any() else np.nan
+    int_days = np.where(gap_n > 0, int_days, med_days)
+    int_km   = np.where(gap_n > 0, int_km, med_km)
+
+    # Last service day and odometer (the last event per vehicle in sorted order)
+    last_ev   = np.searchsorted(idx["maint_key"], (np.arange(V, dtype=np.int64) + 1) << 32) - 1
+    serviced  = services > 0
+    last_day  = np.where(serviced, idx["maint_key"][np.maximum(last_ev, 0)] & 0xFFFFFFFF, -1)
+    last_odo  = np.where(serviced, ev["odometer_km"].to_numpy()[np.maximum(last_ev, 0)], 0.0)
+
+    # Odometer now and trailing daily km rate
+    vstart = _vehicle_start(idx)
+    key_v  = np.arange(V, dtype=np.int64) << 32
+    now    = np.searchsorted(idx["trip_key"], key_v | asof_d, side="right")
+    back   = np.searchsorted(idx["trip_key"], key_v | max(asof_d - RATE_DAYS, 0), side="right")
+    csum   = idx["trip_csum"]
+    odo    = csum[now] - csum[vstart]
+    daily  = (csum[now] - csum[back]) / RATE_DAYS
+    first_day = idx["trip_key"][np.minimum(vstart, len(idx["trip_key"]) - 1)] & 0xFFFFFFFF
+    anchor = np.where(serviced, last_day, np.where(now > vstart, first_day, asof_d))
+
+    since_km  = odo - last_odo
+    due_time  = anchor + int_days
+    with np.errstate(divide="ignore", invalid="ignore"):
+        due_km = np.where(daily > 0, asof_d + (int_km - since_km) / daily, np.inf)
+    # Interval already exceeded: due on the day of the trip that crossed it
+    crossed = since_km >= int_km
+    hit     = np.searchsorted(csum, csum[vstart] + last_odo + np.where(crossed, int_km, 0), side="left")
+    hit_day = idx["trip_key"][np.clip(hit - 1, 0, len(idx["trip_key"]) - 1)] & 0xFFFFFFFF
+    due_km  = np.where(crossed, np.maximum(hit_day, anchor), due_km)
+    due_km  = np.where(np.isnan(due_km), np.inf, due_km)
+    due       = np.minimum(due_time, due_km)
+
+    to_date = lambda d: origin + pd.to_timedelta(np.round(d), unit="D")
+    return pd.DataFrame({
+        "vehicle_id":        idx["vehicle_ids"],
+        "services":          services,
+        "last_service":      to_date(np.where(serviced, last_day, np.nan)),
+        "odometer_km":       np.round(odo, 1),
+        "km_since_service":  np.round(since_km, 1),
+        "interval_days":     np.round(int_days, 1),
+        "interval_km":       np.round(int_km, 1),
+        "daily_km":          np.round(daily, 1),
+        "due_by":            np.where(due_km < due_time, "km", "time"),
+        "next_service_date": to_date(due),
+        "days_until":        np.round(due - asof_d).astype(int),
+        "overdue":           due < asof_d,
+    }).sort_values("next_service_date").reset_index(drop=True)
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Fleet maintenance forecast")
+    ap.add_argument("--asof", default=None, help="forecast date (default: latest trip)")
+    ap.add_argument("--out", default=FORECAST_PATH)
+    args = ap.parse_args()
+    trips = pd.read_csv("data/route_logs.csv", parse_dates=["trip_date"])
+    maint = pd.read_csv("data/maintenance_history.csv", parse_dates=["maint_date"])
+    fc = forecast_next_service(trips, maint, args.asof)
+    os.makedirs(os.path.dirname(args.out) or ".", exist_ok=True)
+    fc.to_csv(args.out, index=False)
+    print(f"=== NEXT SERVICE (as of {args.asof or trips['trip_date'].max().date()}) ===")
+    for r in fc.head(10).itertuples():
+        flag = "  ⚠ overdue" if r.overdue else ""
+        print(f"  {r.vehicle_id:<6} {r.next_service_date.date()}  ({r.days_until:+d} d, by {r.due_by}){flag}")
+    print(f"✅ Forecast saved: {args.out} ({len(fc)} vehicles, {int(fc['overdue'].sum())} overdue)")
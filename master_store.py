@@ -0,0 +1,211 @@
+"""
+Transportation Analytics System
+Master store: date-partitioned master table (year=YYYY/month=MM) with partition pruning
+
+Within a partition the rows are stored grouped by (vehicle, driver, route
+category); the partition's index.csv lists each group with its row count and
+byte range, so an entity scope reads only the matching row blocks.
+"""
+import hashlib
+import io
+import os
+import shutil
+import numpy as np
+import pandas as pd
+
+from column_cache import data_version
+
+PARTITION_ROOT = "data/master_partitions"
+PART_FILE      = "trips.csv"
+INDEX_FILE     = "index.csv"
+FINGERPRINT    = "fingerprint.txt"   # content hash of the rows last written
+VERSION_FILE   = "VERSION"           # master data version the store mirrors
+# Entity columns recorded in each partition's index, keyed by scope filter name
+INDEX_KEYS     = {"vehicle_ids": "vehicle_id", "driver_ids": "driver_id",
+                  "route_categories": "route_category"}
+
+# ── Layout helpers ────────────────────────────────────────────────────────────
+def partition_path(year, month, root=PARTITION_ROOT):
+    return os.path.join(root, f"year={year:04d}", f"month={month:02d}")
+
+def list_partitions(root=PARTITION_ROOT):
+    """Sorted list of (year, month) partitions present on disk."""
+    parts = []
+    if not os.path.isdir(root):
+        return parts
+    for y_dir in os.listdir(root):
+        if not y_dir.startswith("year="):
+            continue
+        for m_dir in os.listdir(os.path.join(root, y_dir)):
+            if m_dir.startswith("month=") and \
+               os.path.exists(os.path.join(root, y_dir, m_dir, PART_FILE)):
+                parts.append((int(y_dir[5:]), int(m_dir[6:])))
+    return sorted(parts)
+
+def _date_bounds(start=None, end=None):
+    """Inclusive calendar-day bounds -> (start, exclusive end) timestamps."""
+    lo = pd.Timestamp(start).normalize() if start is not None else None
+    hi = pd.Timestamp(end).normalize() + pd.Timedelta(days=1) if end is not None else None
+    return lo, hi
+
+def prune_partitions(parts, start=None, end=None):
+    """Keep only the (year, month) partitions that can hold trips in [start, end]."""
+    lo, hi = _date_bounds(start, end)
+    lo_key = (lo.year, lo.month) if lo is not None else None
+    hi_last = hi - pd.Timedelta(days=1) if hi is not None else None
+    hi_key = (hi_last.year, hi_last.month) if hi_last is not None else None
+    return [p for p in parts
+            if (lo_key is None or p >= lo_key) and (hi_key is None or p <= hi_key)]
+
+# ── Write ─────────────────────────────────────────────────────────────────────
+def partition_fingerprint(part):
+    """Content hash of one month's rows (column names, order and values)."""
+    h = hashlib.sha1("\x1f".join(part.columns).encode())
+    h.update(pd.util.hash_pandas_object(part, index=False).to_numpy().tobytes())
+    return h.hexdigest()
+
+def _stored_fingerprint(path):
+    fp = os.path.join(path, FINGERPRINT)
+    if not os.path.exists(fp) or not os.path.exists(os.path.join(path, PART_FILE)):
+        return None
+    with open(fp) as f:
+        return f.read().strip()
+
+def _grouped_csv(part):
+    """CSV bytes of `part` with rows grouped by the entity keys, plus the entity
+    index: one row per (vehicle, driver, category) with its row count and the
+    byte range [offset, offset + nbytes) of its block in the file."""
+    keys = list(INDEX_KEYS.values())
+    part = part.sort_values(keys, kind="stable")
+    data = part.to_csv(index=False, lineterminator="\n").encode()
+    ends = np.flatnonzero(np.frombuffer(data, dtype=np.uint8) == ord("\n")) + 1
+    index = part.groupby(keys, sort=False).size().rename("rows").reset_index()
+    first = np.concatenate([[0], np.cumsum(index["rows"].to_numpy())])
+    index["offset"] = ends[first[:-1]]            # ends[0] is the end of the header
+    index["nbytes"] = ends[first[1:]] - index["offset"]
+    return data, index
+
+def write_partitions(master, root=PARTITION_ROOT, overwrite=False):
+    """Write one CSV per trip month, mirroring `master`.
+
+    A month is rewritten only when the fingerprint of its rows differs from the
+    one stored with the partition (late trips, re-derived columns, cost-model
+    changes), or always with overwrite=True; unchanged months are left as they
+    are. Months no longer present in `master` are removed. Returns the list of
+    written partitions.
+    """
+    existing = set(list_partitions(root))
+    dates    = pd.to_datetime(master["trip_date"])
+    written, seen = [], set()
+    for (year, month), part in master.groupby([dates.dt.year, dates.dt.month], sort=True):
+        key  = (int(year), int(month))
+        path = partition_path(*key, root=root)
+        seen.add(key)
+        fingerprint = partition_fingerprint(part)
+        if not overwrite and _stored_fingerprint(path) == fingerprint:
+            continue
+        os.makedirs(path, exist_ok=True)
+        data, index = _grouped_csv(part)
+        tmp = os.path.join(path, PART_FILE + ".tmp")
+        with open(tmp, "wb") as f:
+            f.write(data)
+        os.replace(tmp, os.path.join(path, PART_FILE))
+        index.to_csv(os.path.join(path, INDEX_FILE), index=False)
+        with open(os.path.join(path, FINGERPRINT), "w") as f:
+            f.write(fingerprint)
+        written.append(key)
+    for key in existing - seen:
+        shutil.rmtree(partition_path(*key, root=root))
+    with open(os.path.join(root, VERSION_FILE), "w") as f:
+        f.write(data_version(master))
+    return written
+
+def store_version(root=PARTITION_ROOT):
+    """Master data version (column_cache.data_version) the store was last synced to."""
+    path = os.path.join(root, VERSION_FILE)
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return f.read().strip()
+
+# ── Read ──────────────────────────────────────────────────────────────────────
+def _entity_mask(df, scope):
+    mask = pd.Series(True, index=df.index)
+    for key, col in INDEX_KEYS.items():
+        if scope.get(key):
+            mask &= df[col].isin(list(scope[key]))
+    return mask
+
+def _partition_blocks(path, scope):
+    """Byte ranges of the rows matching the scope's entities, merged where
+    adjacent; None means read the whole file (no entity filter, or a partition
+    written without block offsets)."""
+    if not any(scope.get(k) for k in INDEX_KEYS):
+        return None
+    idx_path = os.path.join(path, INDEX_FILE)
+    if not os.path.exists(idx_path):
+        return None
+    index = pd.read_csv(idx_path)
+    if "offset" not in index.columns:
+        return None if _entity_mask(index, scope).any() else []
+    hit = index[_entity_mask(index, scope)].sort_values("offset")
+    blocks = []
+    for off, n in zip(hit["offset"], hit["nbytes"]):
+        if blocks and blocks[-1][0] + blocks[-1][1] == off:
+            blocks[-1][1] += n
+        else:
+            blocks.append([off, n])
+    return blocks
+
+def _read_partition(path, blocks, usecols):
+    file = os.path.join(path, PART_FILE)
+    if blocks is None:
+        return pd.read_csv(file, usecols=usecols, parse_dates=["trip_date"])
+    with open(file, "rb") as f:
+        buf = [f.readline()]
+        for off, n in blocks:
+            f.seek(off)
+            buf.append(f.read(n))
+    return pd.read_csv(io.BytesIO(b"".join(buf)), usecols=usecols, parse_dates=["trip_date"])
+
+def scope_mask(df, scope):
+    """Boolean row mask for `scope` over an already loaded master table.
+
+    scope = dict with optional keys start, end, vehicle_ids, driver_ids, route_categories
+    """
+    lo, hi = _date_bounds(scope.get("start"), scope.get("end"))
+    mask = _entity_mask(df, scope)
+    if lo is not None: mask &= df["trip_date"] >= lo
+    if hi is not None: mask &= df["trip_date"] < hi
+    return mask
+
+def filter_scope(df, scope):
+    """In-memory equivalent of read_scope() for an already loaded master table."""
+    return df[scope_mask(df, scope)].reset_index(drop=True)
+
+def read_scope(scope, root=PARTITION_ROOT, columns=None):
+    """Load the trips matching `scope`, reading only partitions whose month
+    overlaps the date range and, within them, only the row blocks the entity
+    index lists for the requested vehicles / drivers / categories."""
+    parts  = prune_partitions(list_partitions(root), scope.get("start"), scope.get("end"))
+    paths  = [partition_path(*p, root=root) for p in parts]
+    reads  = [(p, _partition_blocks(p, scope)) for p in paths]
+    reads  = [(p, b) for p, b in reads if b is None or b]
+    if not reads:
+        stored = list_partitions(root)
+        if not stored:
+            return pd.DataFrame(columns=columns)
+        reads = [(partition_path(*stored[0], root=root), [])]   # header only: the stored schema
+    usecols = None
+    if columns is not None:
+        usecols = sorted(set(columns) | {"trip_date"} |
+                         {c for k, c in INDEX_KEYS.items() if scope.get(k)})
+    df = pd.concat([_read_partition(p, b, usecols) for p, b in reads], ignore_index=True)
+    df["trip_date"] = pd.to_datetime(df["trip_date"])   # also typed when no rows matched
+    df = filter_scope(df.sort_values("trip_date", kind="stable"), scope)
+    return df if columns is None else df[list(columns)]
+
+def read_partitions(start=None, end=None, root=PARTITION_ROOT, columns=None):
+    """Load trips dated within [start, end] (inclusive days), reading only the
+    partitions whose month overlaps the range."""
+    return read_scope({"start": start, "end": end}, root=root, columns=columns)
@@ -0,0 +1,240 @@
+"""
+Transportation Analytics System
+Step 5b: Incremental PDF assembly from cached per-section fragments
+
+Usage:
+    python pdf_fragments.py [--out outputs/Transportation_Analytics_Report.pdf] [--full]
+
+Each report section is rendered to its own PDF in data/pdf_fragments/, named
+by a hash of exactly what the section reads: the master columns it
+aggregates (or the driver / fleet-stats aggregates it is built from), the
+chart PNGs it embeds, the label and the pdf_report.py source. A daily refresh
+re-renders only sections whose inputs changed; the rest are reused as-is.
+
+The contents page is always rendered last (it is one small page) from the
+headings each fragment recorded, offset by the page counts of the fragments
+before it. The merged document is then stamped with "Page i of N" footers,
+so it matches a full build_pdf() page for page.
+
+pypdf is optional: without it every build falls back to a full build_pdf().
+"""
+import argparse
+import hashlib
+import io
+import json
+import os
+import re
+
+from reportlab.lib.pagesizes import A4
+from reportlab.pdfgen import canvas as rl_canvas
+from reportlab.platypus import PageBreak
+
+import pdf_report
+from column_cache import load_master, data_version, current_version
+from fleet_stats import cached_stats, STAT_COLS
+
+try:
+    from pypdf import PdfReader, PdfWriter
+except ImportError:         # optional: no pypdf -> full builds only
+    PdfReader = PdfWriter = None
+
+FRAGMENT_DIR = "data/pdf_fragments"
+CONTENTS     = "contents"
+
+# section -> what it reads. "cols": master columns, "charts": PNGs,
+# "drivers": driver_scores() table, "stats": fleet_stats result (or STAT_COLS)
+SECTION_INPUTS = {
+    "cover":           {"cols": ["vehicle_id", "distance_km", "delivery_status"]},
+    "summary":         {"cols": ["vehicle_id", "driver_id", "route_name", "distance_km", "total_trip_cost_inr",
+                                 "fuel_efficiency_kml", "delivery_status", "delay_minutes", "cost_per_km",
+                                 "fuel_consumed_l", "route_category", "weather"],
+                        "drivers": True},
+    "fuel":            {"cols": ["vehicle_type", "trip_id", "fuel_efficiency_kml", "fuel_consumed_l", "fuel_cost_inr"],
+                        "charts": ["charts/chart1_fuel_efficiency_by_vehicle.png",
+                                   "charts/chart2_monthly_fuel_trend.png"]},
+    "route":           {"cols": ["route_category", "trip_id", "distance_km", "fuel_efficiency_kml",
+                                 "delay_minutes", "cost_per_km", "total_trip_cost_inr"],
+                        "charts": ["charts/chart4_route_cost_delay.png",
+                                   "charts/chart8_route_category_kpis.png"]},
+    "delay":           {"cols": ["traffic_level", "delay_minutes"],
+                        "charts": ["charts/chart5_delivery_delay_analysis.png"]},
+    "driver":          {"drivers": True,
+                        "charts": ["charts/chart3_driver_performance_ranking.png"]},
+    "vehicle":         {"charts": ["charts/chart7_vehicle_performance_matrix.png",
+                                   "charts/chart9_maintenance_cost.png"]},
+    "insights":        {"stats": True,
+                        "charts": ["charts/chart6_correlation_heatmap.png"]},
+    "recommendations": {"cols": ["fuel_efficiency_kml"], "drivers": True},
+}
+
+# ── Fragment keys ─────────────────────────────────────────────────────────────
+def _source_version():
+    with open(pdf_report.__file__, "rb") as f:
+        return hashlib.sha1(f.read()).hexdigest()
+
+def section_keys(master, opts):
+    """Content key per section (excluding the contents page, which is never cached)."""
+    col_hash, chart_hash = {}, {}
+    def col(c):
+        if c not in col_hash:
+            col_hash[c] = data_version(master[[c]])
+        return col_hash[c]
+    def png(p):
+        if p not in chart_hash:
+            if opts.get("charts", True) and os.path.exists(p):
+                with open(p, "rb") as f:
+                    chart_hash[p] = hashlib.sha1(f.read()).hexdigest()
+            else:
+                chart_hash[p] = None
+        return chart_hash[p]
+
+    base = [_source_version(), opts.get("label"), bool(opts.get("charts", True))]
+    keys = {}
+    for key, _ in pdf_report.SECTIONS:
+        spec = SECTION_INPUTS.get(key)
+        if spec is None:
+            continue
+        parts = base + [key]
+        parts += [[c, col(c)] for c in spec.get("cols", [])]
+        parts += [[p, png(p)] for p in spec.get("charts", [])]
+        if spec.get("drivers"):
+            if "drivers_version" not in opts:
+                # hashing the aggregate, not the trips: only a changed ranking re-renders
+                d = pdf_report.drivers(master, opts)
+                opts["drivers_version"] = [data_version(d["table"]), d["bottom_threshold"]]
+            parts.append(opts["drivers_version"])
+        if spec.get("stats"):
+            stats = opts.get("stats")
+            # the figures, not the version tag: any master change bumps the version
+            parts.append({k: v for k, v in stats.items() if k != "version"} if stats
+                         else [[c, col(c)] for c in STAT_COLS])
+        keys[key] = hashlib.sha1(json.dumps(parts, default=str).encode()).hexdigest()[:16]
+    return keys
+
+def cache_files(cache_dir, section=None):
+    """Files this module wrote to `cache_dir` (one section's, or all of them):
+    <section>-<digest>.pdf/.json, the contents page and leftover .tmp files."""
+    if section:
+        names = re.escape(section) + r"-[0-9a-f]{16}"
+    else:
+        names = "(?:" + "|".join(map(re.escape, SECTION_INPUTS)) + r")-[0-9a-f]{16}|" + CONTENTS
+    own = re.compile(rf"(?:{names})\.(?:pdf|json)(?:\.tmp)?")
+    if not os.path.isdir(cache_dir):
+        return []
+    return [os.path.join(cache_dir, f) for f in sorted(os.listdir(cache_dir)) if own.fullmatch(f)]
+
+# ── Rendering ─────────────────────────────────────────────────────────────────
+def render_fragment(section, master, opts, path):
+    """Render one section on its own (no footer) and record its page count and headings."""
+    story = section(master, opts)
+    while story and isinstance(story[-1], PageBreak):
+        story.pop()
+    tmp = path + ".tmp"
+    canv = {}
+    def maker(*a, **kw):
+        canv["c"] = pdf_report.HeadingCanvas(*a, **kw)
+        return canv["c"]
+    pdf_report.report_doc(tmp).build(story, canvasmaker=maker)
+    meta = {"pages": canv["c"].getPageNumber() - 1, "headings": canv["c"].headings}
+    os.replace(tmp, path)
+    with open(path[:-4] + ".json", "w") as f:
+        json.dump(meta, f)
+    return meta
+
+def _fragment(key, digest, master, opts, cache_dir):
+    """Cached fragment path + meta for one section; True as third item if it was rendered."""
+    path = os.path.join(cache_dir, f"{key}-{digest}.pdf")
+    if os.path.exists(path) and os.path.exists(path[:-4] + ".json"):
+        with open(path[:-4] + ".json") as f:
+            return path, json.load(f), False
+    meta = render_fragment(dict(pdf_report.SECTIONS)[key], master, opts, path)
+    for old in cache_files(cache_dir, key):
+        if not old.startswith(path[:-4]):
+            os.remove(old)
+    return path, meta, True
+
+def _footers(total):
+    buf = io.BytesIO()
+    c = rl_canvas.Canvas(buf, pagesize=A4)
+    for page in range(1, total + 1):
+        pdf_report.draw_footer(c, page, total)
+        c.showPage()
+    c.save()
+    buf.seek(0)
+    return PdfReader(buf)
+
+# ── Assembly ──────────────────────────────────────────────────────────────────
+def build_pdf_cached(master, path=pdf_report.PDF_PATH, label="FY 2023", charts=True, stats=None,
+                     cache_dir=FRAGMENT_DIR):
+    """Same document as pdf_report.build_pdf(), re-rendering only changed sections.
+    Returns (path, sections re-rendered)."""
+    if PdfWriter is None:
+        pdf_report.build_pdf(master, path, label, charts, stats)
+        return path, [key for key, _ in pdf_report.SECTIONS]
+
+    os.makedirs(cache_dir, exist_ok=True)
+    opts  = {"label": label, "charts": charts, "stats": stats}
+    keys  = section_keys(master, opts)
+    parts, rebuilt = [], []
+    for key, _ in pdf_report.SECTIONS:
+        if key == "contents":
+            parts.append(None)
+            continue
+        frag, meta, fresh = _fragment(key, keys[key], master, opts, cache_dir)
+        parts.append((frag, meta))
+        if fresh:
+            rebuilt.append(key)
+
+    # Contents page: entries need the contents page's own length, so settle it first
+    at       = parts.index(None)
+    before   = sum(m["pages"] for _, m in parts[:at])
+    toc_path = os.path.join(cache_dir, CONTENTS + ".pdf")
+    toc_pages = 1
+    while True:
+        entries, page = [], before + toc_pages + 1
+        for _, meta in parts[at + 1:]:
+            entries += [(title, page + p - 1) for title, p in meta["headings"]]
+            page += meta["pages"]
+        toc_meta = render_fragment(pdf_report.contents_section, master, dict(opts, contents=entries), toc_path)
+        if toc_meta["pages"] == toc_pages:
+            break
+        toc_pages = toc_meta["pages"]
+    parts[at] = (toc_path, toc_meta)
+
+    writer = PdfWriter()
+    for frag, _ in parts:
+        writer.append(frag)          # brings each fragment's section bookmark along
+    total  = len(writer.pages)
+    stamps = _footers(total)
+    for page, stamp in zip(writer.pages, stamps.pages):
+        page.merge_page(stamp)
+    writer.add_metadata({"/Title": "Transportation Analytics Report", "/Author": "Analytics System"})
+
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:
+        writer.write(f)
+    os.replace(tmp, path)
+    return path, rebuilt
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Incremental PDF report build")
+    ap.add_argument("--out", default=pdf_report.PDF_PATH)
+    ap.add_argument("--cache-dir", default=FRAGMENT_DIR)
+    ap.add_argument("--full", action="store_true", help="ignore cached fragments")
+    args = ap.parse_args()
+
+    if args.full:
+        for f in cache_files(args.cache_dir):
+            os.remove(f)
+    version = current_version()
+    master  = load_master(pdf_report.REPORT_COLS, decode=False)
+    stats   = cached_stats()
+    out, rebuilt = build_pdf_cached(master, args.out, stats=stats if stats["version"] == version else None,
+                                    cache_dir=args.cache_dir)
+    if PdfWriter is None:
+        print("⚠ pypdf not installed — full build")
+    cached = [k for k in SECTION_INPUTS if k not in rebuilt]
+    print(f"  Re-rendered : {', '.join(rebuilt) or 'none'}")
+    print(f"  From cache  : {', '.join(cached) or 'none'}")
+    print(f"✅ PDF report saved: {out}")
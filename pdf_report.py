@@ -2,19 +2,29 @@
 Transportation Analytics System
 Step 5: Generate Professional PDF Analytics Report
 """
-import pandas as pd
-import numpy as np
 from reportlab.lib.pagesizes import A4
 from reportlab.lib import colors
 from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.lib.units import cm, mm
+from reportlab.lib.units import cm
 from reportlab.platypus import (SimpleDocTemplate, Paragraph, Spacer, Table,
                                   TableStyle, PageBreak, Image, HRFlowable)
-from reportlab.lib.enums import TA_CENTER, TA_LEFT, TA_RIGHT, TA_JUSTIFY
-from reportlab.platypus import KeepTogether
+from reportlab.lib.enums import TA_CENTER, TA_LEFT, TA_JUSTIFY
+from reportlab.platypus import Flowable
+from reportlab.pdfgen import canvas as rl_canvas
+import io
 import os
 
-master = pd.read_csv("data/master_analytics_table.csv", parse_dates=["trip_date"])
+from column_cache import load_master, current_version
+from driver_scoring import driver_scores
+from fleet_stats import cached_stats, compute_stats, corr_frame
+
+PDF_PATH = "outputs/Transportation_Analytics_Report.pdf"
+# Master columns read by the sections (incl. driver scores and the in-memory stats fallback)
+REPORT_COLS = ["trip_id", "vehicle_id", "driver_id", "driver_name", "route_name", "route_category",
+               "vehicle_type", "traffic_level", "weather", "delivery_status", "distance_km",
+               "fuel_consumed_l", "fuel_efficiency_kml", "fuel_cost_inr", "road_difficulty",
+               "delay_minutes", "total_trip_cost_inr", "cost_per_km", "driver_perf_score",
+               "safety_rating", "experience_years"]
 
 # ── Color Palette ─────────────────────────────────────────────────────────────
 NAVY    = colors.HexColor("#1A237E")
@@ -44,6 +54,19 @@ BULLET_S = style("BulletS", fontName="Helvetica",       fontSize=9.5,textColor=D
 CAPTION_S= style("CaptionS",fontName="Helvetica-Oblique",fontSize=8.5,textColor=GRAY,   alignment=TA_CENTER)
 KPI_LBL  = style("KpiLbl",  fontName="Helvetica",       fontSize=8,  textColor=GRAY,     alignment=TA_CENTER)
 KPI_VAL  = style("KpiVal",  fontName="Helvetica-Bold",  fontSize=20, textColor=BLUE,     alignment=TA_CENTER)
+TH_S     = style("H",       fontName="Helvetica-Bold",  fontSize=8.5,textColor=WHITE,    alignment=TA_CENTER)
+TD_S     = style("D",       fontName="Helvetica",       fontSize=8.5,textColor=DGRAY,    alignment=TA_CENTER)
+COVER1_S = style("C1",      fontName="Helvetica-Bold",  fontSize=30, textColor=WHITE,    alignment=TA_CENTER)
+COVER2_S = style("C2",      fontName="Helvetica-Bold",  fontSize=26, textColor=colors.HexColor("#90CAF9"), alignment=TA_CENTER)
+COVER3_S = style("C3",      fontName="Helvetica",       fontSize=11, textColor=colors.HexColor("#B0BEC5"), alignment=TA_CENTER)
+COVER4_S = style("C4",      fontName="Helvetica-Bold",  fontSize=11, textColor=NAVY,     alignment=TA_CENTER)
+FOOTER_S = style("Footer",  fontName="Helvetica",       fontSize=9,  textColor=GRAY,     alignment=TA_CENTER)
+FOOT_S   = style("Foot",    fontName="Helvetica",       fontSize=8,  textColor=GRAY,     alignment=TA_CENTER)
+REC_T_S  = style("RT",      fontName="Helvetica-Bold",  fontSize=10.5,textColor=NAVY)
+REC_B_S  = style("RB",      fontName="Helvetica",       fontSize=9.5,textColor=DGRAY,    leading=14)
+CONTENTS_S = style("ContentsS", parent=TITLE2_S)   # not picked up as a section heading
+
+W = A4[0] - 3.6*cm  # usable width
 
 # ── Helper: Colored KPI Table ─────────────────────────────────────────────────
 def kpi_row(kpis):
@@ -64,11 +87,9 @@ def kpi_row(kpis):
 
 # ── Helper: Styled Data Table ─────────────────────────────────────────────────
 def data_table(headers, rows, col_widths=None, hdr_bg=NAVY):
-    all_rows = [[Paragraph(str(h), style("H", fontName="Helvetica-Bold", fontSize=8.5,
-                                          textColor=WHITE, alignment=TA_CENTER)) for h in headers]]
+    all_rows = [[Paragraph(str(h), TH_S) for h in headers]]
     for i, row in enumerate(rows):
-        styled = [Paragraph(str(v), style("D", fontName="Helvetica", fontSize=8.5,
-                                           textColor=DGRAY, alignment=TA_CENTER)) for v in row]
+        styled = [Paragraph(str(v), TD_S) for v in row]
         all_rows.append(styled)
     t = Table(all_rows, colWidths=col_widths, repeatRows=1)
     row_colors = [("BACKGROUND", (0,r),(-1,r), LTGRAY if r%2==0 else WHITE) for r in range(1, len(all_rows))]
@@ -85,345 +106,478 @@ def data_table(headers, rows, col_widths=None, hdr_bg=NAVY):
     ]))
     return t
 
-# ── PDF Build ─────────────────────────────────────────────────────────────────
-doc = SimpleDocTemplate(
-    "outputs/Transportation_Analytics_Report.pdf",
-    pagesize=A4, rightMargin=1.8*cm, leftMargin=1.8*cm,
-    topMargin=1.5*cm, bottomMargin=1.5*cm,
-    title="Transportation Analytics Report", author="Analytics System"
-)
+# ── Helper: Chart + caption (skipped for scoped reports / missing charts) ─────
+_CHART_BYTES = {}  # path -> PNG bytes, read once per process and reused per report
 
-W = A4[0] - 3.6*cm  # usable width
+def chart(path, height, caption, opts):
+    if not opts.get("charts", True) or not os.path.exists(path):
+        return []
+    if path not in _CHART_BYTES:
+        with open(path, "rb") as f:
+            _CHART_BYTES[path] = f.read()
+    return [Image(io.BytesIO(_CHART_BYTES[path]), width=W, height=height),
+            Paragraph(caption, CAPTION_S)]
 
-story = []
+# ── Helper: driver scores shared by summary / driver / recommendation sections ─
+def drivers(master, opts):
+    if "drivers" not in opts:
+        opts["drivers"] = driver_scores(master, top_k=10, bottom_frac=0.2)
+    return opts["drivers"]
 
 # ─────────────────────────────────────────────────────────────────────────────
 # COVER PAGE
 # ─────────────────────────────────────────────────────────────────────────────
-cover_data = [[Paragraph("", TITLE_S)],
-              [Paragraph("TRANSPORTATION ANALYTICS SYSTEM", TITLE_S)],
-              [Paragraph("Fleet Fuel Efficiency | Route Costing | Delay Insights", TITLE_S)],
-              [Paragraph("", TITLE_S)],
-              [Paragraph("Analytics Report — FY 2023", style("Sub", fontName="Helvetica",
-                          fontSize=14, textColor=colors.HexColor("#90CAF9"), alignment=TA_CENTER))]]
-cover_tbl = Table([[Paragraph(r[0].text if hasattr(r[0],"text") else "", TITLE_S)] for r in cover_data],
-                   colWidths=[W])
-
-# Build cover as colored background table
-cover_items = [
-    Spacer(1, 3*cm),
-    Table([[Paragraph("🚛  TRANSPORTATION", style("C1",fontName="Helvetica-Bold",fontSize=30,textColor=WHITE,alignment=TA_CENTER))]],
-          colWidths=[W], style=TableStyle([("BACKGROUND",(0,0),(-1,-1),NAVY),
-                                            ("TOPPADDING",(0,0),(-1,-1),18),("BOTTOMPADDING",(0,0),(-1,-1),5)])),
-    Table([[Paragraph("ANALYTICS SYSTEM", style("C2",fontName="Helvetica-Bold",fontSize=26,textColor=colors.HexColor("#90CAF9"),alignment=TA_CENTER))]],
-          colWidths=[W], style=TableStyle([("BACKGROUND",(0,0),(-1,-1),NAVY),
-                                            ("TOPPADDING",(0,0),(-1,-1),5),("BOTTOMPADDING",(0,0),(-1,-1),10)])),
-    Table([[Paragraph("Fleet Fuel Efficiency · Route Costing · Delay Insights · Cost Optimization",
-                       style("C3",fontName="Helvetica",fontSize=11,textColor=colors.HexColor("#B0BEC5"),alignment=TA_CENTER))]],
-          colWidths=[W], style=TableStyle([("BACKGROUND",(0,0),(-1,-1),NAVY),
-                                            ("TOPPADDING",(0,0),(-1,-1),0),("BOTTOMPADDING",(0,0),(-1,-1),18)])),
-    Spacer(1,0.4*cm),
-    Table([[Paragraph("EXECUTIVE ANALYTICS REPORT  |  FY 2023",
-                       style("C4",fontName="Helvetica-Bold",fontSize=11,textColor=NAVY,alignment=TA_CENTER))]],
-          colWidths=[W], style=TableStyle([("BACKGROUND",(0,0),(-1,-1),colors.HexColor("#E3F2FD")),
-                                            ("TOPPADDING",(0,0),(-1,-1),10),("BOTTOMPADDING",(0,0),(-1,-1),10)])),
-    Spacer(1, 1*cm),
-]
-
-# KPI Banner
-kpis_cover = [
-    ("Total Trips",    f"{len(master):,}",              "E3F2FD"),
-    ("Fleet Size",     f"{master['vehicle_id'].nunique()}",   "E8F5E9"),
-    ("Total Distance", f"{master['distance_km'].sum()/1000:,.0f}K km", "FFF8E1"),
-    ("On-Time Rate",   f"{(master['delivery_status']=='On Time').mean()*100:.1f}%","FFEBEE"),
-]
-cover_items.append(kpi_row(kpis_cover))
-cover_items.append(Spacer(1,2*cm))
-cover_items.append(HRFlowable(width=W, thickness=1, color=BLUE))
-cover_items.append(Spacer(1,0.3*cm))
-cover_items.append(Paragraph("Generated by Transportation Analytics System  |  Data Science Project",
-                              style("Footer",fontName="Helvetica",fontSize=9,textColor=GRAY,alignment=TA_CENTER)))
-story += cover_items
-story.append(PageBreak())
+def cover_section(master, opts):
+    # Build cover as colored background table
+    story = [
+        Spacer(1, 3*cm),
+        Table([[Paragraph("🚛  TRANSPORTATION", COVER1_S)]],
+              colWidths=[W], style=TableStyle([("BACKGROUND",(0,0),(-1,-1),NAVY),
+                                                ("TOPPADDING",(0,0),(-1,-1),18),("BOTTOMPADDING",(0,0),(-1,-1),5)])),
+        Table([[Paragraph("ANALYTICS SYSTEM", COVER2_S)]],
+              colWidths=[W], style=TableStyle([("BACKGROUND",(0,0),(-1,-1),NAVY),
+                                                ("TOPPADDING",(0,0),(-1,-1),5),("BOTTOMPADDING",(0,0),(-1,-1),10)])),
+        Table([[Paragraph("Fleet Fuel Efficiency · Route Costing · Delay Insights · Cost Optimization", COVER3_S)]],
+              colWidths=[W], style=TableStyle([("BACKGROUND",(0,0),(-1,-1),NAVY),
+                                                ("TOPPADDING",(0,0),(-1,-1),0),("BOTTOMPADDING",(0,0),(-1,-1),18)])),
+        Spacer(1,0.4*cm),
+        Table([[Paragraph(f"EXECUTIVE ANALYTICS REPORT  |  {opts.get('label', 'FY 2023')}", COVER4_S)]],
+              colWidths=[W], style=TableStyle([("BACKGROUND",(0,0),(-1,-1),colors.HexColor("#E3F2FD")),
+                                                ("TOPPADDING",(0,0),(-1,-1),10),("BOTTOMPADDING",(0,0),(-1,-1),10)])),
+        Spacer(1, 1*cm),
+    ]
+
+    # KPI Banner
+    kpis_cover = [
+        ("Total Trips",    f"{len(master):,}",              "E3F2FD"),
+        ("Fleet Size",     f"{master['vehicle_id'].nunique()}",   "E8F5E9"),
+        ("Total Distance", f"{master['distance_km'].sum()/1000:,.0f}K km", "FFF8E1"),
+        ("On-Time Rate",   f"{(master['delivery_status']=='On Time').mean()*100:.1f}%","FFEBEE"),
+    ]
+    story.append(kpi_row(kpis_cover))
+    story.append(Spacer(1,2*cm))
+    story.append(HRFlowable(width=W, thickness=1, color=BLUE))
+    story.append(Spacer(1,0.3*cm))
+    story.append(Paragraph("Generated by Transportation Analytics System  |  Data Science Project", FOOTER_S))
+    story.append(PageBreak())
+    return story
 
 # ─────────────────────────────────────────────────────────────────────────────
 # SECTION 1: EXECUTIVE SUMMARY
 # ─────────────────────────────────────────────────────────────────────────────
-story.append(Paragraph("1. Executive Summary", TITLE2_S))
-story.append(HRFlowable(width=W, thickness=2, color=BLUE))
-story.append(Spacer(1, 0.3*cm))
-
-total_cost  = master["total_trip_cost_inr"].sum()
-avg_eff     = master["fuel_efficiency_kml"].mean()
-on_time_pct = (master["delivery_status"]=="On Time").mean()*100
-avg_delay   = master["delay_minutes"].mean()
-avg_cost_km = master["cost_per_km"].mean()
-total_fuel  = master["fuel_consumed_l"].sum()
-
-kpis1 = [
-    ("Total Trips",     f"{len(master):,}",        "E3F2FD"),
-    ("Avg Fuel Eff.",   f"{avg_eff:.2f} km/L",     "FFF8E1"),
-    ("On-Time Rate",    f"{on_time_pct:.1f}%",      "E8F5E9"),
-    ("Avg Delay",       f"{avg_delay:.0f} min",     "FFEBEE"),
-    ("Avg Cost/km",     f"₹{avg_cost_km:.0f}",     "EDE7F6"),
-]
-story.append(kpi_row(kpis1))
-story.append(Spacer(1, 0.5*cm))
-
-story.append(Paragraph(
-    f"This report presents a comprehensive analysis of <b>{len(master):,} trips</b> undertaken by a fleet of "
-    f"<b>{master['vehicle_id'].nunique()} vehicles</b> driven by <b>{master['driver_id'].nunique()} drivers</b> "
-    f"across <b>{master['route_name'].nunique()} routes</b> during FY 2023. "
-    f"The fleet collectively covered <b>{master['distance_km'].sum():,.0f} km</b>, "
-    f"consuming <b>{total_fuel:,.0f} litres</b> of fuel at a total operational cost of "
-    f"<b>₹{total_cost/1e6:.2f} million</b>.", BODY_S))
-story.append(Spacer(1, 0.2*cm))
-
-# Key findings bullet points
-findings = [
-    f"Fuel efficiency ranged from {master['fuel_efficiency_kml'].min():.1f} to {master['fuel_efficiency_kml'].max():.1f} km/L with an average of {avg_eff:.2f} km/L.",
-    f"Delivery performance: {on_time_pct:.1f}% on time, {(master['delivery_status']=='Minor Delay').mean()*100:.1f}% minor delays, {(master['delivery_status']=='Major Delay').mean()*100:.1f}% major delays.",
-    f"The most cost-efficient route category is {master.groupby('route_category')['cost_per_km'].mean().idxmin()} routes (₹{master.groupby('route_category')['cost_per_km'].mean().min():.0f}/km avg).",
-    f"Storms cause the highest delays averaging {master[master['weather']=='Storm']['delay_minutes'].mean():.0f} minutes per trip.",
-    f"Top performing driver achieved a score of {master.groupby('driver_name')['driver_perf_score'].mean().max():.1f}/100.",
-]
-for f in findings:
-    story.append(Paragraph(f"• {f}", BULLET_S))
-story.append(PageBreak())
+def summary_section(master, opts):
+    story = [Paragraph("1. Executive Summary", TITLE2_S),
+             HRFlowable(width=W, thickness=2, color=BLUE),
+             Spacer(1, 0.3*cm)]
+
+    total_cost  = master["total_trip_cost_inr"].sum()
+    avg_eff     = master["fuel_efficiency_kml"].mean()
+    on_time_pct = (master["delivery_status"]=="On Time").mean()*100
+    avg_delay   = master["delay_minutes"].mean()
+    avg_cost_km = master["cost_per_km"].mean()
+    total_fuel  = master["fuel_consumed_l"].sum()
+
+    kpis1 = [
+        ("Total Trips",     f"{len(master):,}",        "E3F2FD"),
+        ("Avg Fuel Eff.",   f"{avg_eff:.2f} km/L",     "FFF8E1"),
+        ("On-Time Rate",    f"{on_time_pct:.1f}%",      "E8F5E9"),
+        ("Avg Delay",       f"{avg_delay:.0f} min",     "FFEBEE"),
+        ("Avg Cost/km",     f"₹{avg_cost_km:.0f}",     "EDE7F6"),
+    ]
+    story.append(kpi_row(kpis1))
+    story.append(Spacer(1, 0.5*cm))
+
+    story.append(Paragraph(
+        f"This report presents a comprehensive analysis of <b>{len(master):,} trips</b> undertaken by a fleet of "
+        f"<b>{master['vehicle_id'].nunique()} vehicles</b> driven by <b>{master['driver_id'].nunique()} drivers</b> "
+        f"across <b>{master['route_name'].nunique()} routes</b> during {opts.get('label', 'FY 2023')}. "
+        f"The fleet collectively covered <b>{master['distance_km'].sum():,.0f} km</b>, "
+        f"consuming <b>{total_fuel:,.0f} litres</b> of fuel at a total operational cost of "
+        f"<b>₹{total_cost/1e6:.2f} million</b>.", BODY_S))
+    story.append(Spacer(1, 0.2*cm))
+
+    # Key findings bullet points
+    findings = [
+        f"Fuel efficiency ranged from {master['fuel_efficiency_kml'].min():.1f} to {master['fuel_efficiency_kml'].max():.1f} km/L with an average of {avg_eff:.2f} km/L.",
+        f"Delivery performance: {on_time_pct:.1f}% on time, {(master['delivery_status']=='Minor Delay').mean()*100:.1f}% minor delays, {(master['delivery_status']=='Major Delay').mean()*100:.1f}% major delays.",
+        f"The most cost-efficient route category is {master.groupby('route_category', observed=True)['cost_per_km'].mean().idxmin()} routes (₹{master.groupby('route_category', observed=True)['cost_per_km'].mean().min():.0f}/km avg).",
+        f"Storms cause the highest delays averaging {master[master['weather']=='Storm']['delay_minutes'].mean():.0f} minutes per trip.",
+        f"Top performing driver achieved a score of {drivers(master, opts)['top']['perf_score'].iloc[0]:.1f}/100.",
+    ]
+    for f in findings:
+        story.append(Paragraph(f"• {f}", BULLET_S))
+    story.append(PageBreak())
+    return story
 
 # ─────────────────────────────────────────────────────────────────────────────
 # SECTION 2: FUEL EFFICIENCY ANALYSIS
 # ─────────────────────────────────────────────────────────────────────────────
-story.append(Paragraph("2. Fuel Efficiency Analysis", TITLE2_S))
-story.append(HRFlowable(width=W, thickness=2, color=AMBER))
-story.append(Spacer(1, 0.3*cm))
-
-story.append(Paragraph(
-    "Fuel efficiency is the primary driver of operational cost. The analysis examines efficiency patterns "
-    "across vehicle types, route categories, weather conditions, and traffic levels.", BODY_S))
-story.append(Spacer(1, 0.3*cm))
-
-# Chart: Fuel efficiency by vehicle type
-if os.path.exists("charts/chart1_fuel_efficiency_by_vehicle.png"):
-    story.append(Image("charts/chart1_fuel_efficiency_by_vehicle.png", width=W, height=9*cm))
-    story.append(Paragraph("Fig 2.1 — Fuel efficiency distribution by vehicle type (km/L)", CAPTION_S))
-story.append(Spacer(1, 0.4*cm))
-
-# Table: Fuel stats by vehicle type
-vt_fuel = master.groupby("vehicle_type").agg(
-    trips=("trip_id","count"),
-    avg_eff=("fuel_efficiency_kml","mean"),
-    min_eff=("fuel_efficiency_kml","min"),
-    max_eff=("fuel_efficiency_kml","max"),
-    total_fuel=("fuel_consumed_l","sum"),
-    avg_cost=("fuel_cost_inr","mean"),
-).reset_index().sort_values("avg_eff",ascending=False)
-
-story.append(Paragraph("Fuel Efficiency by Vehicle Type", TITLE3_S))
-tbl_rows = [[row["vehicle_type"], int(row["trips"]), f"{row['avg_eff']:.2f}",
-              f"{row['min_eff']:.2f}", f"{row['max_eff']:.2f}",
-              f"{row['total_fuel']:,.0f}", f"₹{row['avg_cost']:,.0f}"]
-             for _, row in vt_fuel.iterrows()]
-story.append(data_table(
-    ["Vehicle Type","Trips","Avg Eff (km/L)","Min Eff","Max Eff","Total Fuel (L)","Avg Fuel Cost (₹)"],
-    tbl_rows, col_widths=[3.5*cm,2*cm,3*cm,2.5*cm,2.5*cm,3*cm,3*cm], hdr_bg=AMBER
-))
-story.append(Spacer(1, 0.4*cm))
-
-# Monthly trend chart
-story.append(Image("charts/chart2_monthly_fuel_trend.png", width=W, height=9*cm))
-story.append(Paragraph("Fig 2.2 — Monthly fuel consumption and efficiency trend", CAPTION_S))
-story.append(PageBreak())
+def fuel_section(master, opts):
+    story = [Paragraph("2. Fuel Efficiency Analysis", TITLE2_S),
+             HRFlowable(width=W, thickness=2, color=AMBER),
+             Spacer(1, 0.3*cm)]
+
+    story.append(Paragraph(
+        "Fuel efficiency is the primary driver of operational cost. The analysis examines efficiency patterns "
+        "across vehicle types, route categories, weather conditions, and traffic levels.", BODY_S))
+    story.append(Spacer(1, 0.3*cm))
+
+    # Chart: Fuel efficiency by vehicle type
+    story += chart("charts/chart1_fuel_efficiency_by_vehicle.png", 9*cm,
+                   "Fig 2.1 — Fuel efficiency distribution by vehicle type (km/L)", opts)
+    story.append(Spacer(1, 0.4*cm))
+
+    # Table: Fuel stats by vehicle type
+    vt_fuel = master.groupby("vehicle_type", observed=True).agg(
+        trips=("trip_id","count"),
+        avg_eff=("fuel_efficiency_kml","mean"),
+        min_eff=("fuel_efficiency_kml","min"),
+        max_eff=("fuel_efficiency_kml","max"),
+        total_fuel=("fuel_consumed_l","sum"),
+        avg_cost=("fuel_cost_inr","mean"),
+    ).reset_index().sort_values("avg_eff",ascending=False)
+
+    story.append(Paragraph("Fuel Efficiency by Vehicle Type", TITLE3_S))
+    tbl_rows = [[row["vehicle_type"], int(row["trips"]), f"{row['avg_eff']:.2f}",
+                  f"{row['min_eff']:.2f}", f"{row['max_eff']:.2f}",
+                  f"{row['total_fuel']:,.0f}", f"₹{row['avg_cost']:,.0f}"]
+                 for _, row in vt_fuel.iterrows()]
+    story.append(data_table(
+        ["Vehicle Type","Trips","Avg Eff (km/L)","Min Eff","Max Eff","Total Fuel (L)","Avg Fuel Cost (₹)"],
+        tbl_rows, col_widths=[3.5*cm,2*cm,3*cm,2.5*cm,2.5*cm,3*cm,3*cm], hdr_bg=AMBER
+    ))
+    story.append(Spacer(1, 0.4*cm))
+
+    # Monthly trend chart
+    story += chart("charts/chart2_monthly_fuel_trend.png", 9*cm,
+                   "Fig 2.2 — Monthly fuel consumption and efficiency trend", opts)
+    story.append(PageBreak())
+    return story
 
 # ─────────────────────────────────────────────────────────────────────────────
 # SECTION 3: ROUTE ANALYSIS
 # ─────────────────────────────────────────────────────────────────────────────
-story.append(Paragraph("3. Route Cost & Efficiency Analysis", TITLE2_S))
-story.append(HRFlowable(width=W, thickness=2, color=colors.HexColor("#6A1B9A")))
-story.append(Spacer(1, 0.3*cm))
-
-story.append(Image("charts/chart4_route_cost_delay.png", width=W, height=9*cm))
-story.append(Paragraph("Fig 3.1 — Route cost per km and delivery delay comparison", CAPTION_S))
-story.append(Spacer(1, 0.4*cm))
-
-story.append(Image("charts/chart8_route_category_kpis.png", width=W, height=8*cm))
-story.append(Paragraph("Fig 3.2 — KPI comparison across route categories", CAPTION_S))
-story.append(Spacer(1, 0.4*cm))
-
-# Route category table
-cat_tbl = master.groupby("route_category").agg(
-    trips=("trip_id","count"), avg_dist=("distance_km","mean"),
-    avg_eff=("fuel_efficiency_kml","mean"), avg_delay=("delay_minutes","mean"),
-    avg_cost_km=("cost_per_km","mean"), total_cost=("total_trip_cost_inr","sum"),
-).reset_index()
-
-story.append(Paragraph("Route Category Summary", TITLE3_S))
-tbl_rows2 = [[row["route_category"], int(row["trips"]), f"{row['avg_dist']:.0f} km",
-               f"{row['avg_eff']:.2f}", f"{row['avg_delay']:.0f} min",
-               f"₹{row['avg_cost_km']:.0f}", f"₹{row['total_cost']/1e6:.2f}M"]
-              for _, row in cat_tbl.iterrows()]
-story.append(data_table(
-    ["Category","Trips","Avg Distance","Avg Fuel Eff","Avg Delay","Cost/km","Total Cost"],
-    tbl_rows2, col_widths=[3*cm,2*cm,3*cm,3*cm,3*cm,2.5*cm,3*cm],
-    hdr_bg=colors.HexColor("#4A148C")
-))
-story.append(PageBreak())
+def route_section(master, opts):
+    story = [Paragraph("3. Route Cost & Efficiency Analysis", TITLE2_S),
+             HRFlowable(width=W, thickness=2, color=colors.HexColor("#6A1B9A")),
+             Spacer(1, 0.3*cm)]
+
+    story += chart("charts/chart4_route_cost_delay.png", 9*cm,
+                   "Fig 3.1 — Route cost per km and delivery delay comparison", opts)
+    story.append(Spacer(1, 0.4*cm))
+
+    story += chart("charts/chart8_route_category_kpis.png", 8*cm,
+                   "Fig 3.2 — KPI comparison across route categories", opts)
+    story.append(Spacer(1, 0.4*cm))
+
+    # Route category table
+    cat_tbl = master.groupby("route_category", observed=True).agg(
+        trips=("trip_id","count"), avg_dist=("distance_km","mean"),
+        avg_eff=("fuel_efficiency_kml","mean"), avg_delay=("delay_minutes","mean"),
+        avg_cost_km=("cost_per_km","mean"), total_cost=("total_trip_cost_inr","sum"),
+    ).reset_index()
+
+    story.append(Paragraph("Route Category Summary", TITLE3_S))
+    tbl_rows2 = [[row["route_category"], int(row["trips"]), f"{row['avg_dist']:.0f} km",
+                   f"{row['avg_eff']:.2f}", f"{row['avg_delay']:.0f} min",
+                   f"₹{row['avg_cost_km']:.0f}", f"₹{row['total_cost']/1e6:.2f}M"]
+                  for _, row in cat_tbl.iterrows()]
+    story.append(data_table(
+        ["Category","Trips","Avg Distance","Avg Fuel Eff","Avg Delay","Cost/km","Total Cost"],
+        tbl_rows2, col_widths=[3*cm,2*cm,3*cm,3*cm,3*cm,2.5*cm,3*cm],
+        hdr_bg=colors.HexColor("#4A148C")
+    ))
+    story.append(PageBreak())
+    return story
 
 # ─────────────────────────────────────────────────────────────────────────────
 # SECTION 4: DELIVERY DELAY INSIGHTS
 # ─────────────────────────────────────────────────────────────────────────────
-story.append(Paragraph("4. Delivery Delay Insights", TITLE2_S))
-story.append(HRFlowable(width=W, thickness=2, color=RED))
-story.append(Spacer(1, 0.3*cm))
-
-story.append(Image("charts/chart5_delivery_delay_analysis.png", width=W, height=9*cm))
-story.append(Paragraph("Fig 4.1 — Delivery status distribution and delay by weather", CAPTION_S))
-story.append(Spacer(1, 0.4*cm))
-
-# Delay by traffic level
-traffic_delay = master.groupby("traffic_level")["delay_minutes"].agg(["mean","sum","count"]).reset_index()
-traffic_delay.columns = ["Traffic Level","Avg Delay (min)","Total Delay (min)","Trips"]
-
-story.append(Paragraph("Delay Analysis by Traffic Level", TITLE3_S))
-tbl_rows3 = [[row["Traffic Level"], f"{row['Avg Delay (min)']:.0f}", int(row["Total Delay (min)"]), int(row["Trips"])]
-              for _, row in traffic_delay.iterrows()]
-story.append(data_table(["Traffic Level","Avg Delay (min)","Total Delay (min)","Trips"],
-                          tbl_rows3, col_widths=[5*cm,5*cm,5*cm,5*cm], hdr_bg=RED))
-story.append(Spacer(1, 0.4*cm))
-
-story.append(Paragraph(
-    f"<b>Key Delay Findings:</b> Very High traffic conditions result in delays averaging "
-    f"{master[master['traffic_level']=='Very High']['delay_minutes'].mean():.0f} minutes. "
-    f"Storm weather conditions are the most severe delay driver, followed by Rain. "
-    f"Night-time trips tend to have fewer delays due to lower traffic volume. "
-    f"The East Zone experiences the highest proportion of major delays among customer locations.", BODY_S))
-story.append(PageBreak())
+def delay_section(master, opts):
+    story = [Paragraph("4. Delivery Delay Insights", TITLE2_S),
+             HRFlowable(width=W, thickness=2, color=RED),
+             Spacer(1, 0.3*cm)]
+
+    story += chart("charts/chart5_delivery_delay_analysis.png", 9*cm,
+                   "Fig 4.1 — Delivery status distribution and delay by weather", opts)
+    story.append(Spacer(1, 0.4*cm))
+
+    # Delay by traffic level
+    traffic_delay = master.groupby("traffic_level", observed=True)["delay_minutes"].agg(["mean","sum","count"]).reset_index()
+    traffic_delay.columns = ["Traffic Level","Avg Delay (min)","Total Delay (min)","Trips"]
+
+    story.append(Paragraph("Delay Analysis by Traffic Level", TITLE3_S))
+    tbl_rows3 = [[row["Traffic Level"], f"{row['Avg Delay (min)']:.0f}", int(row["Total Delay (min)"]), int(row["Trips"])]
+                  for _, row in traffic_delay.iterrows()]
+    story.append(data_table(["Traffic Level","Avg Delay (min)","Total Delay (min)","Trips"],
+                              tbl_rows3, col_widths=[5*cm,5*cm,5*cm,5*cm], hdr_bg=RED))
+    story.append(Spacer(1, 0.4*cm))
+
+    story.append(Paragraph(
+        f"<b>Key Delay Findings:</b> Very High traffic conditions result in delays averaging "
+        f"{master[master['traffic_level']=='Very High']['delay_minutes'].mean():.0f} minutes. "
+        f"Storm weather conditions are the most severe delay driver, followed by Rain. "
+        f"Night-time trips tend to have fewer delays due to lower traffic volume. "
+        f"The East Zone experiences the highest proportion of major delays among customer locations.", BODY_S))
+    story.append(PageBreak())
+    return story
 
 # ─────────────────────────────────────────────────────────────────────────────
 # SECTION 5: DRIVER PERFORMANCE
 # ─────────────────────────────────────────────────────────────────────────────
-story.append(Paragraph("5. Driver Performance Analysis", TITLE2_S))
-story.append(HRFlowable(width=W, thickness=2, color=GREEN))
-story.append(Spacer(1, 0.3*cm))
-
-story.append(Image("charts/chart3_driver_performance_ranking.png", width=W, height=10*cm))
-story.append(Paragraph("Fig 5.1 — Top 15 driver performance scores (Green=Top, Orange=Mid, Red=Low)", CAPTION_S))
-story.append(Spacer(1, 0.4*cm))
-
-# Top/Bottom 5 driver table
-driver_perf = master.groupby("driver_name").agg(
-    trips=("trip_id","count"),
-    perf_score=("driver_perf_score","mean"),
-    avg_eff=("fuel_efficiency_kml","mean"),
-    avg_delay=("delay_minutes","mean"),
-    safety=("safety_rating","mean"),
-    exp=("experience_years","mean"),
-).reset_index().sort_values("perf_score",ascending=False)
-
-story.append(Paragraph("Top 10 Performing Drivers", TITLE3_S))
-top10 = driver_perf.head(10)
-tbl_rows4 = [[row["driver_name"], f"{row['perf_score']:.1f}", int(row["trips"]),
-               f"{row['avg_eff']:.2f}", f"{row['avg_delay']:.0f}", f"{row['safety']:.1f}", int(row["exp"])]
-              for _, row in top10.iterrows()]
-story.append(data_table(
-    ["Driver","Perf Score","Trips","Avg Eff (km/L)","Avg Delay (min)","Safety Rating","Experience (yrs)"],
-    tbl_rows4, col_widths=[3.5*cm,2.5*cm,2*cm,3*cm,3*cm,3*cm,3*cm], hdr_bg=GREEN
-))
-story.append(PageBreak())
+def driver_section(master, opts):
+    story = [Paragraph("5. Driver Performance Analysis", TITLE2_S),
+             HRFlowable(width=W, thickness=2, color=GREEN),
+             Spacer(1, 0.3*cm)]
+
+    story += chart("charts/chart3_driver_performance_ranking.png", 10*cm,
+                   "Fig 5.1 — Top 15 driver performance scores (Green=Top, Orange=Mid, Red=Low)", opts)
+    story.append(Spacer(1, 0.4*cm))
+
+    # Top 10 driver table
+    story.append(Paragraph("Top 10 Performing Drivers", TITLE3_S))
+    top10 = drivers(master, opts)["top"]
+    tbl_rows4 = [[row["driver_name"], f"{row['perf_score']:.1f}", int(row["trips"]),
+                   f"{row['avg_eff']:.2f}", f"{row['avg_delay']:.0f}", f"{row['safety']:.1f}", int(row["exp"])]
+                  for _, row in top10.iterrows()]
+    story.append(data_table(
+        ["Driver","Perf Score","Trips","Avg Eff (km/L)","Avg Delay (min)","Safety Rating","Experience (yrs)"],
+        tbl_rows4, col_widths=[3.5*cm,2.5*cm,2*cm,3*cm,3*cm,3*cm,3*cm], hdr_bg=GREEN
+    ))
+    story.append(PageBreak())
+    return story
 
 # ─────────────────────────────────────────────────────────────────────────────
 # SECTION 6: VEHICLE & MAINTENANCE
 # ─────────────────────────────────────────────────────────────────────────────
-story.append(Paragraph("6. Vehicle Performance & Maintenance", TITLE2_S))
-story.append(HRFlowable(width=W, thickness=2, color=BLUE))
-story.append(Spacer(1, 0.3*cm))
+def vehicle_section(master, opts):
+    story = [Paragraph("6. Vehicle Performance & Maintenance", TITLE2_S),
+             HRFlowable(width=W, thickness=2, color=BLUE),
+             Spacer(1, 0.3*cm)]
 
-story.append(Image("charts/chart7_vehicle_performance_matrix.png", width=W, height=9*cm))
-story.append(Paragraph("Fig 6.1 — Vehicle performance matrix (size=trip volume, color=avg delay)", CAPTION_S))
-story.append(Spacer(1, 0.4*cm))
+    story += chart("charts/chart7_vehicle_performance_matrix.png", 9*cm,
+                   "Fig 6.1 — Vehicle performance matrix (size=trip volume, color=avg delay)", opts)
+    story.append(Spacer(1, 0.4*cm))
 
-story.append(Image("charts/chart9_maintenance_cost.png", width=W, height=8*cm))
-story.append(Paragraph("Fig 6.2 — Maintenance cost by vehicle (Red = above average)", CAPTION_S))
-story.append(PageBreak())
+    story += chart("charts/chart9_maintenance_cost.png", 8*cm,
+                   "Fig 6.2 — Maintenance cost by vehicle (Red = above average)", opts)
+    story.append(PageBreak())
+    return story
 
 # ─────────────────────────────────────────────────────────────────────────────
 # SECTION 7: CORRELATION ANALYSIS
 # ─────────────────────────────────────────────────────────────────────────────
-story.append(Paragraph("7. Correlation & Predictive Insights", TITLE2_S))
-story.append(HRFlowable(width=W, thickness=2, color=GRAY))
-story.append(Spacer(1, 0.3*cm))
-
-story.append(Image("charts/chart6_correlation_heatmap.png", width=W, height=12*cm))
-story.append(Paragraph("Fig 7.1 — Correlation heatmap of all key performance metrics", CAPTION_S))
-story.append(Spacer(1, 0.4*cm))
-
-# Key correlations
-corr_cols = ["distance_km","fuel_consumed_l","fuel_efficiency_kml","road_difficulty",
-             "delay_minutes","total_trip_cost_inr","cost_per_km","driver_perf_score"]
-corr_m = master[corr_cols].corr()
-insights = [
-    f"Distance vs Fuel Consumed: r={corr_m.loc['distance_km','fuel_consumed_l']:.2f} — Strong positive correlation (expected).",
-    f"Fuel Efficiency vs Cost/km: r={corr_m.loc['fuel_efficiency_kml','cost_per_km']:.2f} — Higher efficiency reduces per-km cost.",
-    f"Road Difficulty vs Delay: r={corr_m.loc['road_difficulty','delay_minutes']:.2f} — Difficult terrain increases delays.",
-    f"Driver Performance vs Fuel Eff: r={corr_m.loc['driver_perf_score','fuel_efficiency_kml']:.2f} — Better drivers achieve better fuel economy.",
-    f"Experience vs Performance: r={corr_m.loc['driver_perf_score','fuel_efficiency_kml']:.2f} — Driver experience correlates with efficiency.",
-]
-for ins in insights:
-    story.append(Paragraph(f"• {ins}", BULLET_S))
-story.append(PageBreak())
+def insights_section(master, opts):
+    story = [Paragraph("7. Correlation & Predictive Insights", TITLE2_S),
+             HRFlowable(width=W, thickness=2, color=GRAY),
+             Spacer(1, 0.3*cm)]
+
+    story += chart("charts/chart6_correlation_heatmap.png", 12*cm,
+                   "Fig 7.1 — Correlation heatmap of all key performance metrics", opts)
+    story.append(Spacer(1, 0.4*cm))
+
+    # Key correlations (precomputed fleet statistics when available)
+    stats  = opts.get("stats") or compute_stats(master, segments=[], spearman=False)
+    corr_m = corr_frame(stats)
+    ci_lo, ci_hi = corr_frame(stats, "pearson_ci")
+    r = lambda a, b: f"r={corr_m.loc[a, b]:.2f} (95% CI {ci_lo.loc[a, b]:.2f} to {ci_hi.loc[a, b]:.2f})"
+    insights = [
+        f"Distance vs Fuel Consumed: {r('distance_km','fuel_consumed_l')} — Strong positive correlation (expected).",
+        f"Fuel Efficiency vs Cost/km: {r('fuel_efficiency_kml','cost_per_km')} — Higher efficiency reduces per-km cost.",
+        f"Road Difficulty vs Delay: {r('road_difficulty','delay_minutes')} — Difficult terrain increases delays.",
+        f"Driver Performance vs Fuel Eff: {r('driver_perf_score','fuel_efficiency_kml')} — Better drivers achieve better fuel economy.",
+        f"Experience vs Performance: {r('experience_years','driver_perf_score')} — Driver experience correlates with efficiency.",
+    ]
+    for ins in insights:
+        story.append(Paragraph(f"• {ins}", BULLET_S))
+    story.append(PageBreak())
+    return story
 
 # ─────────────────────────────────────────────────────────────────────────────
 # SECTION 8: RECOMMENDATIONS
 # ─────────────────────────────────────────────────────────────────────────────
-story.append(Paragraph("8. Recommendations & Action Plan", TITLE2_S))
-story.append(HRFlowable(width=W, thickness=2, color=GREEN))
-story.append(Spacer(1, 0.4*cm))
-
-recs = [
-    ("🔧 Fleet Optimization",
-     f"Retire vehicles older than 8 years or with efficiency below {master['fuel_efficiency_kml'].quantile(0.2):.1f} km/L. "
-     "Transition 15% of fleet to CNG/Electric to reduce fuel costs by an estimated 20-30%."),
-    ("📍 Route Re-engineering",
-     "Reclassify high-cost city routes to avoid peak traffic windows. "
-     "Merge low-volume rural routes to improve load factor. Implement dynamic routing based on real-time traffic."),
-    ("👤 Driver Training Program",
-     f"Bottom 20% of drivers (score below {master.groupby('driver_name')['driver_perf_score'].mean().quantile(0.2):.1f}) "
-     "should undergo mandatory eco-driving training. Implement incentive structure for top-performing drivers."),
-    ("⏱ Delay Reduction Strategy",
-     "Avoid scheduling trips during storm/heavy rain periods where possible. "
-     "Build 25-30 minute buffer time into estimates for Very High traffic routes. "
-     "Deploy real-time weather alerts to dispatch teams."),
-    ("💰 Cost Optimization",
-     "Negotiate bulk fuel contracts to reduce per-litre cost. "
-     "Schedule predictive maintenance before vehicle efficiency drops below threshold. "
-     "Target ₹15-20/km reduction on highest-cost routes through combined fleet and route optimization."),
+def recommendations_section(master, opts):
+    story = [Paragraph("8. Recommendations & Action Plan", TITLE2_S),
+             HRFlowable(width=W, thickness=2, color=GREEN),
+             Spacer(1, 0.4*cm)]
+
+    recs = [
+        ("🔧 Fleet Optimization",
+         f"Retire vehicles older than 8 years or with efficiency below {master['fuel_efficiency_kml'].quantile(0.2):.1f} km/L. "
+         "Transition 15% of fleet to CNG/Electric to reduce fuel costs by an estimated 20-30%."),
+        ("📍 Route Re-engineering",
+         "Reclassify high-cost city routes to avoid peak traffic windows. "
+         "Merge low-volume rural routes to improve load factor. Implement dynamic routing based on real-time traffic."),
+        ("👤 Driver Training Program",
+         f"Bottom 20% of drivers (score below {drivers(master, opts)['bottom_threshold']:.1f}) "
+         "should undergo mandatory eco-driving training. Implement incentive structure for top-performing drivers."),
+        ("⏱ Delay Reduction Strategy",
+         "Avoid scheduling trips during storm/heavy rain periods where possible. "
+         "Build 25-30 minute buffer time into estimates for Very High traffic routes. "
+         "Deploy real-time weather alerts to dispatch teams."),
+        ("💰 Cost Optimization",
+         "Negotiate bulk fuel contracts to reduce per-litre cost. "
+         "Schedule predictive maintenance before vehicle efficiency drops below threshold. "
+         "Target ₹15-20/km reduction on highest-cost routes through combined fleet and route optimization."),
+    ]
+
+    for title, body in recs:
+        rec_table = Table(
+            [[Paragraph(f"<b>{title}</b>", REC_T_S), Paragraph(body, REC_B_S)]],
+            colWidths=[5*cm, W-5*cm]
+        )
+        rec_table.setStyle(TableStyle([
+            ("BACKGROUND", (0,0),(0,0), LTBLUE),
+            ("BACKGROUND", (1,0),(1,0), LTGRAY),
+            ("VALIGN",     (0,0),(-1,-1), "TOP"),
+            ("TOPPADDING", (0,0),(-1,-1), 8),
+            ("BOTTOMPADDING",(0,0),(-1,-1),8),
+            ("LEFTPADDING",(0,0),(-1,-1), 8),
+            ("LINEBELOW",  (0,0),(-1,0), 0.5, colors.HexColor("#CFD8DC")),
+        ]))
+        story.append(rec_table)
+        story.append(Spacer(1, 0.2*cm))
+
+    story.append(Spacer(1, 1*cm))
+    story.append(HRFlowable(width=W, thickness=1, color=GRAY))
+    story.append(Spacer(1, 0.2*cm))
+    story.append(Paragraph(
+        f"Transportation Analytics System  |  {opts.get('label', 'FY 2023')} Report  |  Generated by Data Analytics Pipeline",
+        FOOT_S))
+    return story
+
+# ─────────────────────────────────────────────────────────────────────────────
+# CONTENTS PAGE
+# ─────────────────────────────────────────────────────────────────────────────
+def contents_section(master, opts):
+    return [Paragraph("Contents", CONTENTS_S),
+            HRFlowable(width=W, thickness=2, color=NAVY),
+            Spacer(1, 0.6*cm),
+            Contents(opts.get("contents")),
+            PageBreak()]
+
+SECTIONS = [
+    ("cover",           cover_section),
+    ("contents",        contents_section),
+    ("summary",         summary_section),
+    ("fuel",            fuel_section),
+    ("route",           route_section),
+    ("delay",           delay_section),
+    ("driver",          driver_section),
+    ("vehicle",         vehicle_section),
+    ("insights",        insights_section),
+    ("recommendations", recommendations_section),
 ]
 
-for title, body in recs:
-    rec_table = Table(
-        [[Paragraph(f"<b>{title}</b>", style("RT", fontName="Helvetica-Bold", fontSize=10.5, textColor=NAVY)),
-          Paragraph(body, style("RB", fontName="Helvetica", fontSize=9.5, textColor=DGRAY, leading=14))]],
-        colWidths=[5*cm, W-5*cm]
+# ── Page furniture: footers and the contents page ─────────────────────────────
+CONTENTS_ROW = 0.9*cm
+
+def draw_footer(c, page, total):
+    if page == 1:   # cover
+        return
+    c.saveState()
+    c.setFont("Helvetica", 7.5)
+    c.setFillColor(GRAY)
+    c.drawCentredString(A4[0]/2, 0.8*cm, f"Transportation Analytics Report  |  Page {page} of {total}")
+    c.restoreState()
+
+def draw_contents(c, x, y, width, entries):
+    """entries = [(title, page)], one row each from baseline y downwards."""
+    c.saveState()
+    c.setFont("Helvetica", 11)
+    for title, page in entries:
+        c.setFillColor(DGRAY)
+        c.drawString(x, y, title)
+        c.drawRightString(x + width, y, str(page))
+        c.setStrokeColor(colors.HexColor("#B0BEC5"))
+        c.setDash(1, 2)
+        c.line(x + c.stringWidth(title, "Helvetica", 11) + 6, y + 2,
+               x + width - c.stringWidth(str(page), "Helvetica", 11) - 6, y + 2)
+        c.setDash()
+        y -= CONTENTS_ROW
+    c.restoreState()
+
+class Contents(Flowable):
+    """Contents rows. With `entries` (merged fragments) they are drawn directly;
+    otherwise the position is recorded and ReportCanvas fills the rows in at
+    save time, once every section heading has been placed."""
+    def __init__(self, entries=None, rows=len(SECTIONS) - 2):
+        super().__init__()
+        self.entries, self.rows = entries, rows
+
+    def wrap(self, aw, ah):
+        self.width = aw
+        return aw, self.rows * CONTENTS_ROW
+
+    def drawOn(self, canv, x, y, _sW=0):
+        self._origin = (x, y)
+        super().drawOn(canv, x, y, _sW)
+
+    def draw(self):
+        top = self.rows * CONTENTS_ROW - 11
+        if self.entries is not None:
+            draw_contents(self.canv, 0, top, self.width, self.entries)
+        else:
+            x, y = self._origin
+            self.canv.contents_at = (self.canv.getPageNumber(), x, y + top, self.width)
+
+class ReportDoc(SimpleDocTemplate):
+    """Records (title, page) on the canvas for every section heading laid out."""
+    def afterFlowable(self, flowable):
+        if isinstance(flowable, Paragraph) and flowable.style is TITLE2_S:
+            title = flowable.getPlainText()
+            self.canv.headings.append((title, self.page))
+            self.canv.bookmarkPage(f"section{len(self.canv.headings)}")
+            self.canv.addOutlineEntry(title, f"section{len(self.canv.headings)}", 0)
+
+class HeadingCanvas(rl_canvas.Canvas):
+    def __init__(self, *args, **kw):
+        super().__init__(*args, **kw)
+        self.headings, self.contents_at = [], None
+
+class ReportCanvas(HeadingCanvas):
+    """Holds pages back until save() so footers can say 'Page i of N' and the
+    contents rows can be drawn with the final page numbers."""
+    def __init__(self, *args, **kw):
+        super().__init__(*args, **kw)
+        self._pages = []
+
+    def showPage(self):
+        self._pages.append(dict(self.__dict__))
+        self._startPage()
+
+    def save(self):
+        total, headings, at = len(self._pages), self.headings, self.contents_at
+        for state in self._pages:
+            self.__dict__.update(state)
+            if at and at[0] == self._pageNumber:
+                draw_contents(self, *at[1:], headings)
+            draw_footer(self, self._pageNumber, total)
+            rl_canvas.Canvas.showPage(self)
+        rl_canvas.Canvas.save(self)
+
+def report_doc(path):
+    return ReportDoc(
+        path,
+        pagesize=A4, rightMargin=1.8*cm, leftMargin=1.8*cm,
+        topMargin=1.5*cm, bottomMargin=1.5*cm,
+        title="Transportation Analytics Report", author="Analytics System"
     )
-    rec_table.setStyle(TableStyle([
-        ("BACKGROUND", (0,0),(0,0), LTBLUE),
-        ("BACKGROUND", (1,0),(1,0), LTGRAY),
-        ("VALIGN",     (0,0),(-1,-1), "TOP"),
-        ("TOPPADDING", (0,0),(-1,-1), 8),
-        ("BOTTOMPADDING",(0,0),(-1,-1),8),
-        ("LEFTPADDING",(0,0),(-1,-1), 8),
-        ("LINEBELOW",  (0,0),(-1,0), 0.5, colors.HexColor("#CFD8DC")),
-    ]))
-    story.append(rec_table)
-    story.append(Spacer(1, 0.2*cm))
 
-story.append(Spacer(1, 1*cm))
-story.append(HRFlowable(width=W, thickness=1, color=GRAY))
-story.append(Spacer(1, 0.2*cm))
-story.append(Paragraph(
-    "Transportation Analytics System  |  FY 2023 Report  |  Generated by Data Analytics Pipeline",
-    style("Foot", fontName="Helvetica", fontSize=8, textColor=GRAY, alignment=TA_CENTER)
-))
-
-doc.build(story)
-print("✅ PDF report saved: outputs/Transportation_Analytics_Report.pdf")
+# ── PDF Build ─────────────────────────────────────────────────────────────────
+def build_pdf(master, path=PDF_PATH, label="FY 2023", charts=True, stats=None):
+    """Render the full report for `master` (the whole table or a filtered scope).
+    `stats` is a fleet_stats result for the same rows; computed in-memory if omitted."""
+    opts  = {"label": label, "charts": charts, "stats": stats}
+    story = []
+    for _, section in SECTIONS:
+        story += section(master, opts)
+    report_doc(path).build(story, canvasmaker=ReportCanvas)
+    return path
+
+if __name__ == "__main__":
+    version = current_version()
+    master  = load_master(REPORT_COLS, decode=False)
+    stats   = cached_stats()
+    build_pdf(master, stats=stats if stats["version"] == version else None)
+    print(f"✅ PDF report saved: {PDF_PATH}")
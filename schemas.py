@@ -0,0 +1,98 @@
+"""
+Transportation Analytics System
+Source schemas shared by the generator, live ingest and validation
+"""
+import math
+import pandas as pd
+
+VEHICLE_TYPES  = ["Truck", "Van", "Sedan", "SUV", "Bus"]
+FUEL_TYPES     = ["Diesel", "Petrol", "CNG", "Electric"]
+ROUTES         = ["Route_City_A", "Route_City_B", "Route_Highway_1",
+                  "Route_Highway_2", "Route_Rural_X", "Route_Rural_Y", "Route_Mixed"]
+ROUTE_CATEGORIES = {"Route_City_A":"City","Route_City_B":"City",
+                    "Route_Highway_1":"Highway","Route_Highway_2":"Highway",
+                    "Route_Rural_X":"Rural","Route_Rural_Y":"Rural","Route_Mixed":"Mixed"}
+TRAFFIC_LEVELS = ["Low","Medium","High","Very High"]
+WEATHER_CONDS  = ["Clear","Rain","Fog","Storm","Hot"]
+DELIVERY_STATUSES = ["On Time","Minor Delay","Major Delay"]
+CUSTOMER_LOCATIONS = ["North Zone","South Zone","East Zone","West Zone","Central"]
+MAINT_TYPES    = ["Oil Change","Tire Rotation","Brake Service","Engine Check","Full Service"]
+
+# field -> spec; spec keys: type (str/int/float/datetime), required, choices, min, max
+SCHEMAS = {
+    "trip": {   # one row of data/route_logs.csv
+        "trip_id":         {"type": "str"},
+        "vehicle_id":      {"type": "str"},
+        "driver_id":       {"type": "str"},
+        "route_name":      {"type": "str", "choices": ROUTES},
+        "trip_date":       {"type": "datetime"},
+        "distance_km":     {"type": "float", "min": 0.1, "max": 2000},
+        "traffic_level":   {"type": "str", "choices": TRAFFIC_LEVELS, "required": False},
+        "weather":         {"type": "str", "choices": WEATHER_CONDS, "required": False},
+        "road_difficulty": {"type": "float", "min": 1, "max": 10},
+        "avg_speed_kmph":  {"type": "float", "min": 1, "max": 150},
+        "route_category":  {"type": "str", "choices": sorted(set(ROUTE_CATEGORIES.values())), "required": False},
+    },
+    "fuel": {   # one row of data/fuel_logs.xlsx
+        "trip_id":             {"type": "str"},
+        "fuel_consumed_l":     {"type": "float", "min": 0.01, "max": 2000},
+        "fuel_efficiency_kml": {"type": "float", "min": 0.5, "max": 60, "required": False},
+        "fuel_cost_inr":       {"type": "float", "min": 0},
+        "refuel_count":        {"type": "int", "min": 0, "required": False},
+    },
+    "delivery": {   # one record of data/delivery_timelines.json
+        "trip_id":             {"type": "str"},
+        "expected_duration_h": {"type": "float", "min": 0},
+        "actual_duration_h":   {"type": "float", "min": 0},
+        "delay_minutes":       {"type": "int", "min": 0},
+        "delivery_status":     {"type": "str", "choices": DELIVERY_STATUSES},
+        "customer_location":   {"type": "str", "choices": CUSTOMER_LOCATIONS, "required": False},
+    },
+}
+
+def _coerce(value, kind):
+    if kind == "str":
+        if not isinstance(value, str): raise TypeError("expected string")
+        return value
+    if kind in ("int", "float"):
+        if isinstance(value, bool): raise TypeError("expected number")
+        number = float(value)
+        # NaN passes every range check and inf overflows int(); neither is a measurement
+        if not math.isfinite(number): raise ValueError(f"{value!r} is not a finite number")
+        if kind == "float":
+            return number
+        if number != int(number): raise TypeError("expected integer")
+        return int(number)
+    if kind == "datetime":
+        return pd.Timestamp(value)
+    raise ValueError(f"unknown type {kind}")
+
+def validate_record(source, record):
+    """Coerce one record to `source`'s schema. Returns (clean_record, errors)."""
+    schema = SCHEMAS[source]
+    clean, errors = {}, []
+    if not isinstance(record, dict):
+        return None, ["record must be a JSON object"]
+    for field, spec in schema.items():
+        value = record.get(field)
+        if value is None or value == "":
+            if spec.get("required", True):
+                errors.append(f"{field}: missing")
+            clean[field] = None
+            continue
+        try:
+            value = _coerce(value, spec["type"])
+        except (TypeError, ValueError, OverflowError) as e:
+            errors.append(f"{field}: {e}")
+            continue
+        if "choices" in spec and value not in spec["choices"]:
+            errors.append(f"{field}: {value!r} not in {spec['choices']}")
+        if "min" in spec and value < spec["min"]:
+            errors.append(f"{field}: {value} < {spec['min']}")
+        if "max" in spec and value > spec["max"]:
+            errors.append(f"{field}: {value} > {spec['max']}")
+        clean[field] = value
+    unknown = set(record) - set(schema)
+    if unknown:
+        errors.append(f"unknown fields: {sorted(unknown)}")
+    return clean, errors
@@ -0,0 +1,170 @@
+"""
+Transportation Analytics System
+Step 6: Scoped report generation (date range / vehicles / drivers / route category)
+
+Usage:
+    python scoped_reports.py --start 2023-03-01 --end 2023-03-31 --name march
+    python scoped_reports.py --scopes scopes.json --format xlsx pdf
+    python scoped_reports.py --by driver_id --format pdf --workers 8      # outputs/<driver_id>.pdf
+
+scopes.json is a list of scope dicts, e.g.
+    [{"name": "V001_q1", "vehicle_ids": ["V001"], "start": "2023-01-01", "end": "2023-03-31"},
+     {"name": "highway",  "route_categories": ["Highway"]}]
+"""
+import argparse
+import json
+import os
+import re
+import numpy as np
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+
+from master_store import read_scope, scope_mask, INDEX_KEYS, PARTITION_ROOT
+
+OUT_DIR = "outputs"        # one report per scope / entity: outputs/<slug>.pdf|xlsx
+
+# ── Scope helpers ─────────────────────────────────────────────────────────────
+def scope_label(scope):
+    """Human-readable label used on report covers / banners."""
+    parts = []
+    if scope.get("start") or scope.get("end"):
+        parts.append(f"{scope.get('start') or 'start'} to {scope.get('end') or 'latest'}")
+    for key in INDEX_KEYS:
+        if scope.get(key):
+            vals = list(scope[key])
+            parts.append(", ".join(vals[:3]) + (f" +{len(vals)-3}" if len(vals) > 3 else ""))
+    return "  |  ".join(parts) or "All Trips"
+
+def scope_slug(scope, i=0):
+    name = scope.get("name") or f"scope_{i+1:03d}"
+    return re.sub(r"[^A-Za-z0-9_.-]+", "_", name)
+
+def union_scope(scopes):
+    """Smallest single scope covering every scope in the batch."""
+    union = {}
+    starts = [s.get("start") for s in scopes]
+    ends   = [s.get("end") for s in scopes]
+    if all(starts): union["start"] = min(pd.Timestamp(d) for d in starts)
+    if all(ends):   union["end"]   = max(pd.Timestamp(d) for d in ends)
+    for key in INDEX_KEYS:
+        if all(s.get(key) for s in scopes):
+            union[key] = sorted({v for s in scopes for v in s[key]})
+    return union
+
+# ── Row groups: (slug, label, row positions into the loaded frame) ───────────
+def scope_groups(data, scopes):
+    return [(scope_slug(s, i), scope_label(s), np.flatnonzero(scope_mask(data, s).to_numpy()))
+            for i, s in enumerate(scopes)]
+
+def entity_groups(data, column, base=None, rows=None, prefix=""):
+    """One group per distinct value of `column` (driver_id / vehicle_id / route_category)
+    among `rows` (default: all), built from a single groupby pass instead of one
+    mask per entity."""
+    base = base or {}
+    key  = {c: k for k, c in INDEX_KEYS.items()}[column]
+    rows = np.arange(len(data)) if rows is None else rows
+    sub  = data[column].iloc[rows]
+    return [(scope_slug({"name": f"{prefix}{val}"}), scope_label({**base, key: [str(val)]}), rows[idx])
+            for val, idx in sorted(sub.groupby(sub, observed=True).indices.items())]
+
+def scope_entity_groups(data, scopes, column):
+    """entity_groups() within each scope; with several scopes the file names are
+    prefixed with the scope's slug so entities in different scopes don't collide."""
+    groups = []
+    for i, s in enumerate(scopes):
+        rows   = np.flatnonzero(scope_mask(data, s).to_numpy())
+        prefix = f"{scope_slug(s, i)}_" if len(scopes) > 1 else ""
+        groups += entity_groups(data, column, s, rows, prefix)
+    return groups
+
+# ── Parallel PDF rendering ────────────────────────────────────────────────────
+_WORKER_DATA = None  # master slice shipped once per worker process
+
+def _init_worker(data):
+    global _WORKER_DATA
+    _WORKER_DATA = data
+    import pdf_report  # noqa: F401  (styles built once per worker at import)
+
+def _render_pdf(task):
+    from pdf_report import build_pdf
+    path, label, idx = task
+    build_pdf(_WORKER_DATA.iloc[idx].reset_index(drop=True), path, label=label, charts=False)
+    return path
+
+def render_pdf_batch(data, groups, out_dir=OUT_DIR, workers=1):
+    """Render one PDF per group to out_dir/<slug>.pdf across `workers` processes.
+
+    The loaded frame is sent to each worker once (pool initializer); tasks only
+    carry row positions, so throughput scales with the number of cores.
+    """
+    tasks = [(os.path.join(out_dir, f"{slug}.pdf"), label, idx)
+             for slug, label, idx in groups if len(idx)]
+    if workers <= 1:
+        _init_worker(data)
+        return [_render_pdf(t) for t in tasks]
+    chunk = max(1, len(tasks) // (workers * 4))
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(data,)) as pool:
+        return list(pool.map(_render_pdf, tasks, chunksize=chunk))
+
+# ── Batch driver ──────────────────────────────────────────────────────────────
+def run_batch(scopes, formats=("xlsx",), out_dir=OUT_DIR, root=PARTITION_ROOT,
+              by=None, workers=1):
+    """Produce one report per scope (or per `by` entity within each scope) in one run.
+
+    The partitions covering the union of all scopes are read once; each scope
+    is then sliced in memory and rendered with the shared, pre-built styles.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    data = read_scope(union_scope(scopes), root=root)
+    if data.empty:
+        print("   ⚠ no matching trips")
+        return []
+    groups = scope_entity_groups(data, scopes, by) if by else scope_groups(data, scopes)
+    for slug, _, idx in groups:
+        if not len(idx):
+            print(f"   ⚠ {slug}: no matching trips — skipped")
+
+    outputs = []
+    if "xlsx" in formats:
+        from excel_report import build_workbook
+        for slug, label, idx in groups:
+            if len(idx):
+                path = os.path.join(out_dir, f"{slug}.xlsx")
+                build_workbook(data.iloc[idx].reset_index(drop=True), path, label=label)
+                outputs.append(path)
+    if "pdf" in formats:
+        outputs += render_pdf_batch(data, groups, out_dir, workers)
+    print(f"   {sum(1 for g in groups if len(g[2]))} scope(s), {len(data)} trips loaded")
+    return outputs
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Generate scoped Excel / PDF reports")
+    ap.add_argument("--scopes", help="JSON file with a list of scope dicts")
+    ap.add_argument("--name")
+    ap.add_argument("--start")
+    ap.add_argument("--end")
+    ap.add_argument("--vehicle", nargs="+", dest="vehicle_ids")
+    ap.add_argument("--driver", nargs="+", dest="driver_ids")
+    ap.add_argument("--category", nargs="+", dest="route_categories")
+    ap.add_argument("--by", choices=list(INDEX_KEYS.values()),
+                    help="one report per distinct entity within the given filters")
+    ap.add_argument("--format", nargs="+", default=["xlsx"], choices=["xlsx", "pdf"])
+    ap.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                    help="processes used for PDF rendering")
+    ap.add_argument("--out-dir", default=OUT_DIR, help="reports are written as <out-dir>/<scope or entity>.pdf|xlsx")
+    args = ap.parse_args(argv)
+
+    if args.scopes:
+        with open(args.scopes) as f:
+            scopes = json.load(f)
+    else:
+        scopes = [{k: v for k, v in vars(args).items()
+                   if k in ("name", "start", "end", *INDEX_KEYS) and v}]
+
+    outputs = run_batch(scopes, formats=args.format, out_dir=args.out_dir,
+                        by=args.by, workers=args.workers)
+    print(f"✅ {len(outputs)} scoped report(s) saved to {args.out_dir}/")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,165 @@
+"""
+Transportation Analytics System
+Step 2c: Delay and fuel-efficiency prediction model (run after etl_pipeline.py)
+
+Usage:
+    python trip_model.py train                          # fit on the master table
+    python trip_model.py score planned.csv [--out predictions.csv]
+
+A ridge regression over one-hot categoricals (traffic, weather, route
+category, vehicle type) and numeric trip features, one output per target.
+The artifact (data/models/trip_model.npz) stores each categorical as a
+lookup table of coefficients and the numerics as folded raw weights, so
+scoring is a gather per categorical plus one small matmul per batch.
+"""
+import argparse
+import os
+import numpy as np
+import pandas as pd
+
+from column_cache import load_master, data_version
+
+MODEL_PATH   = "data/models/trip_model.npz"
+CAT_FEATURES = ["traffic_level", "weather", "route_category", "vehicle_type"]
+NUM_FEATURES = ["road_difficulty", "experience_years", "avg_speed_kmph"]
+TARGETS      = ["delay_minutes", "fuel_efficiency_kml"]
+FLOORS       = {"delay_minutes": 0.0, "fuel_efficiency_kml": 0.5}
+RIDGE        = 1.0
+BATCH        = 1 << 16    # rows per scoring batch (keeps temporaries in cache)
+
+# ── Encoding ──────────────────────────────────────────────────────────────────
+def encode(model, trips):
+    """(codes int32 n x n_cat, numerics float64 n x n_num) for scoring.
+    Unseen categories get code -1, which maps to a zero coefficient."""
+    codes = np.empty((len(trips), len(CAT_FEATURES)), dtype=np.int32)
+    for j, f in enumerate(CAT_FEATURES):
+        codes[:, j] = pd.Index(model["vocab"][f]).get_indexer(trips[f])
+    X = trips[NUM_FEATURES].to_numpy(float)
+    missing = np.isnan(X)
+    if missing.any():
+        X[missing] = np.take(model["num_fill"], np.nonzero(missing)[1])
+    return codes, X
+
+def _design(trips, vocab, mean, std):
+    blocks = []
+    for f in CAT_FEATURES:
+        codes = pd.Index(vocab[f]).get_indexer(trips[f])
+        onehot = np.zeros((len(trips), len(vocab[f])))
+        ok = codes >= 0
+        onehot[np.flatnonzero(ok), codes[ok]] = 1.0
+        blocks.append(onehot)
+    X = trips[NUM_FEATURES].to_numpy(float)
+    X = np.where(np.isnan(X), mean, X)
+    blocks.append((X - mean) / std)
+    return np.hstack(blocks)
+
+# ── Training ──────────────────────────────────────────────────────────────────
+def _ridge(A, Y, lam):
+    a_mean, y_mean = A.mean(axis=0), Y.mean(axis=0)
+    Ac = A - a_mean
+    W  = np.linalg.solve(Ac.T @ Ac + lam * np.eye(A.shape[1]), Ac.T @ (Y - y_mean))
+    return y_mean - a_mean @ W, W
+
+def fit_model(master, ridge=RIDGE):
+    """Fit every target at once; returns the model dict used by predict()/save_model()."""
+    data  = master.dropna(subset=TARGETS)
+    vocab = {f: sorted(data[f].dropna().astype(str).unique()) for f in CAT_FEATURES}
+    X     = data[NUM_FEATURES].to_numpy(float)
+    mean  = np.nanmean(X, axis=0)
+    std   = np.nanstd(X, axis=0)
+    std[std == 0] = 1.0
+    A     = _design(data, vocab, mean, std)
+    Y     = data[TARGETS].to_numpy(float)
+    b, W  = _ridge(A, Y, ridge)
+
+    # Fold into lookup tables (one extra zero row for unseen codes) and raw-unit weights
+    tables, i = {}, 0
+    for f in CAT_FEATURES:
+        k = len(vocab[f])
+        tables[f] = np.vstack([W[i:i + k], np.zeros((1, len(TARGETS)))])
+        i += k
+    num_w     = W[i:] / std[:, None]
+    intercept = b - mean @ num_w
+    return {"vocab": vocab, "tables": tables, "num_w": num_w, "intercept": intercept,
+            "num_fill": mean, "trained_on": data_version(data[CAT_FEATURES + NUM_FEATURES + TARGETS]),
+            "rows": len(data)}
+
+def evaluate(master, holdout=0.2, seed=42):
+    """Holdout MAE / R² per target for a model fit on the remaining rows."""
+    rng  = np.random.default_rng(seed)
+    test = rng.random(len(master)) < holdout
+    model = fit_model(master[~test])
+    truth = master.loc[test, TARGETS].to_numpy(float)
+    pred  = predict(model, master[test]).to_numpy()
+    out = {}
+    for j, t in enumerate(TARGETS):
+        err = pred[:, j] - truth[:, j]
+        out[t] = {"mae": float(np.abs(err).mean()),
+                  "r2":  float(1 - (err ** 2).sum() / ((truth[:, j] - truth[:, j].mean()) ** 2).sum())}
+    return out
+
+# ── Artifact ──────────────────────────────────────────────────────────────────
+def save_model(model, path=MODEL_PATH):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    arrays = {"intercept": model["intercept"], "num_w": model["num_w"], "num_fill": model["num_fill"],
+              "trained_on": np.array(model["trained_on"]), "rows": np.array(model["rows"])}
+    for f in CAT_FEATURES:
+        arrays[f"vocab__{f}"]  = np.array(model["vocab"][f], dtype=str)
+        arrays[f"table__{f}"]  = model["tables"][f]
+    tmp = path + ".tmp.npz"
+    np.savez_compressed(tmp, **arrays)
+    os.replace(tmp, path)
+    return path
+
+def load_model(path=MODEL_PATH):
+    with np.load(path, allow_pickle=False) as z:
+        return {"vocab":      {f: z[f"vocab__{f}"].tolist() for f in CAT_FEATURES},
+                "tables":     {f: z[f"table__{f}"] for f in CAT_FEATURES},
+                "num_w":      z["num_w"], "intercept": z["intercept"], "num_fill": z["num_fill"],
+                "trained_on": str(z["trained_on"]), "rows": int(z["rows"])}
+
+# ── Scoring ───────────────────────────────────────────────────────────────────
+def score_encoded(model, codes, X, batch=BATCH):
+    """Batched inference on pre-encoded arrays; returns (n x len(TARGETS)) float64."""
+    n      = len(codes)
+    out    = np.empty((n, len(TARGETS)))
+    tables = [model["tables"][f] for f in CAT_FEATURES]
+    floors = np.array([FLOORS[t] for t in TARGETS])
+    for s in range(0, n, batch):
+        e = min(s + batch, n)
+        y = X[s:e] @ model["num_w"]
+        y += model["intercept"]
+        for j, tab in enumerate(tables):
+            y += tab[codes[s:e, j]]           # code -1 hits the zero row
+        np.maximum(y, floors, out=out[s:e])
+    return out
+
+def predict(model, trips, batch=BATCH):
+    """Predicted delay_minutes and fuel_efficiency_kml for planned trips."""
+    codes, X = encode(model, trips)
+    return pd.DataFrame(score_encoded(model, codes, X, batch),
+                        columns=[f"pred_{t}" for t in TARGETS], index=trips.index)
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Trip delay / fuel-efficiency model")
+    ap.add_argument("--model", default=MODEL_PATH)
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    sub.add_parser("train", help="fit on the master table and save the artifact")
+    sc = sub.add_parser("score", help="score planned trips from a CSV")
+    sc.add_argument("input")
+    sc.add_argument("--out", default="outputs/trip_predictions.csv")
+    args = ap.parse_args()
+
+    if args.cmd == "train":
+        master = load_master(CAT_FEATURES + NUM_FEATURES + TARGETS)
+        print("=== HOLDOUT (20%) ===")
+        for t, m in evaluate(master).items():
+            print(f"  {t:<20} MAE {m['mae']:7.3f}   R² {m['r2']:.3f}")
+        save_model(fit_model(master), args.model)
+        print(f"✅ Model saved: {args.model} ({os.path.getsize(args.model):,} bytes)")
+    else:
+        trips = pd.read_csv(args.input)
+        out   = pd.concat([trips, predict(load_model(args.model), trips)], axis=1)
+        os.makedirs(os.path.dirname(args.out) or ".", exist_ok=True)
+        out.to_csv(args.out, index=False)
+        print(f"✅ Predictions saved: {args.out} ({len(out):,} trips)")